@@ -1,60 +1,168 @@
 import json
+import os
+from collections import OrderedDict
 import sys
+import threading
 import random
 import string
 import logging
-import datetime
 import time
 
 import robot
 from robot.api import logger
 from robot.libraries.BuiltIn import BuiltIn
 
-from keystoneauth1.identity import v3
-from keystoneauth1 import session as kssession
-from keystoneclient.v3 import client as ksclient
+try:
+    from .lazyimport import LazyModule
+    from .clientpool import ClientPool
+    from .parallel import DEFAULT_CONCURRENCY, run_parallel, chunks, expand_names
+    from .polling import Backoff
+    from .teardown import delete_and_wait
+    from .nameindex import NameIndex
+    from .imageupload import CHUNK_SIZE, ImageSource
+    from .latency import KeywordListener, LatencyRecorder
+    from .tokencache import TokenCache
+    from .inventory import INVENTORY_FIELDS, Inventory
+    from . import loadprofile
+    from .readcache import ReadCache
+    from .consolewatch import TAIL_LINES, ConsoleWatch
+    from .ledger import CLEANUP_TIERS, Ledger
+except ImportError:
+    # the suites import this file by path, outside of the package
+    from lazyimport import LazyModule
+    from clientpool import ClientPool
+    from parallel import DEFAULT_CONCURRENCY, run_parallel, chunks, expand_names
+    from polling import Backoff
+    from teardown import delete_and_wait
+    from nameindex import NameIndex
+    from imageupload import CHUNK_SIZE, ImageSource
+    from latency import KeywordListener, LatencyRecorder
+    from tokencache import TokenCache
+    from inventory import INVENTORY_FIELDS, Inventory
+    import loadprofile
+    from readcache import ReadCache
+    from consolewatch import TAIL_LINES, ConsoleWatch
+    from ledger import CLEANUP_TIERS, Ledger
 
-from novaclient import client as nvclient
-from neutronclient.v2_0 import client as ntclient
-from novaclient.exceptions import NotFound
-from heatclient import client as htclient
-from glanceclient import client as gcclient
+# the client libraries are imported when a keyword first uses them
+v3 = LazyModule('keystoneauth1.identity.v3')
+kssession = LazyModule('keystoneauth1.session')
+ksexceptions = LazyModule('keystoneauth1.exceptions')
+ksclient = LazyModule('keystoneclient.v3.client')
+nvclient = LazyModule('novaclient.client')
+nvexceptions = LazyModule('novaclient.exceptions')
+ntclient = LazyModule('neutronclient.v2_0.client')
+ntexceptions = LazyModule('neutronclient.common.exceptions')
+htclient = LazyModule('heatclient.client')
+htexc = LazyModule('heatclient.exc')
+gcclient = LazyModule('glanceclient.client')
+gcexc = LazyModule('glanceclient.exc')
 
 NOVA_API_VERSION=2
 HEAT_API_VERSION='1'
 GLANCE_API_VERSION='2'
+NEUTRON_BULK_SIZE=50
+STACK_PAGE_SIZE=100
+NEUTRON_PAGE_SIZE=500
 
 class OpenStackKeywords(object):
     ROBOT_LIBRARY_SCOPE = 'GLOBAL'
     
     def __init__(self):
         self._cache = robot.utils.ConnectionCache('No sessions created')
+        self._clients = ClientPool()
+        self._names = NameIndex()
+        self._latency = LatencyRecorder()
+        self._tokens = TokenCache()
+        self._reads = ReadCache()
+        self._ledger = Ledger()
+        # per thread, keywords run concurrently by Run Keyword On Aliases and Run Load Profile
+        self._bypass_reads = threading.local()
+        self.ROBOT_LIBRARY_LISTENER = KeywordListener(self._latency, self)
+        self._server_timings = {}
+        self._deletion_timings = {}
+        self._stack_timings = {}
+        self._endpoints = OrderedDict()
         self.builtin = BuiltIn()
         self.debug = 0
 
     def create_session(self, alias, auth_url, username, password, project_name, domain='default',
-                       verify=True):
+                       verify=True, token_cache=None, refresh_before=120, region_name=None, interface=None):
 
         """ Create Session: create a session to OpenStack
         `alias` Robot Framework alias to identify the session
         `auth_url` Auth url of the server, e.g. https://my.keystone.com:5000/v3
         `verify` set to CA cert path if the client should verify the certificate
+        `token_cache` directory where the scoped token is kept and reused by later sessions and processes
+        `refresh_before` seconds before expiry when the token is renewed
+        `region_name` and `interface` select the service endpoints used by the keywords
+        Sessions with the same credentials share their authentication and token.
         """
 
         self.builtin.log('Creating session: %s' % alias, 'DEBUG')
-        auth = v3.Password(auth_url=auth_url,
-                           username=username,
-                           password=password,
-                           project_name=project_name,
-                           #domain_name=domain,
-                           user_domain_name = domain,
-                           project_domain_name = domain
-                           )
-        sess = kssession.Session(auth=auth, verify = verify)
+        key = TokenCache.key(auth_url, username, password, project_name, domain)
+        auth = self._tokens.plugin(key, lambda: v3.Password(auth_url=auth_url,
+                                                             username=username,
+                                                             password=password,
+                                                             project_name=project_name,
+                                                             #domain_name=domain,
+                                                             user_domain_name = domain,
+                                                             project_domain_name = domain
+                                                             ))
+        auth.MIN_TOKEN_LIFE_SECONDS = int(refresh_before)
+        sess = self._new_session(alias, auth, verify)
+        if token_cache is not None and auth.auth_ref is None:
+            # the password is left out of the file name, the cache directory may be readable by others
+            cache_key = TokenCache.key(auth_url, username, project_name, domain)
+            if self._tokens.load(auth, cache_key, token_cache, refresh_before):
+                self.builtin.log('Reusing cached token for session: %s' % alias, 'DEBUG')
+            else:
+                sess.get_token()
+                self._tokens.save(auth, cache_key, token_cache)
         #self.builtin.log('Created session: %s' % sess.auth.__dict__, 'DEBUG')
         #ks = ksclient.Client(session=sess)
         #users = ks.projects.list()
         #self.builtin.log('Users: %s' % users, 'DEBUG')
+        return self._register_session(alias, sess, region_name, interface)
+
+    def create_session_from_token(self, alias, auth_url, token, project_name, domain='default', verify=True,
+                                  region_name=None, interface=None):
+        """ Create Session From Token: create a session to OpenStack from an existing keystone token
+        `alias` Robot Framework alias to identify the session
+        `token` token rescoped to `project_name`, e.g. the result of `Get Session Token`
+        """
+        self.builtin.log('Creating session from token: %s' % alias, 'DEBUG')
+        key = TokenCache.key(auth_url, token, project_name, domain)
+        auth = self._tokens.plugin(key, lambda: v3.Token(auth_url=auth_url,
+                                                          token=token,
+                                                          project_name=project_name,
+                                                          project_domain_name=domain))
+        sess = self._new_session(alias, auth, verify)
+        return self._register_session(alias, sess, region_name, interface)
+
+    def create_region_session(self, alias, source_alias, region_name=None, interface=None):
+        """ Create Region Session: create a session sharing the authentication of `source_alias` but using the
+        endpoints of another `region_name` and/or `interface`, e.g. to fan out a keyword over the regions of a cloud
+        """
+        self.builtin.log('Creating session %s for region %s from %s' % (alias, region_name, source_alias), 'DEBUG')
+        source = self._cache.switch(source_alias)
+        sess = self._new_session(alias, source.auth, source.verify)
+        return self._register_session(alias, sess, region_name, interface)
+
+    def get_session_token(self, alias):
+        """ Get Session Token: return the keystone token of the session `alias`
+        """
+        return self._cache.switch(alias).get_token()
+
+    def _new_session(self, alias, auth, verify):
+        sess = kssession.Session(auth=auth, verify=verify)
+        return self._latency.instrument(sess, alias)
+
+    def _register_session(self, alias, sess, region_name=None, interface=None):
+        self._clients.invalidate(alias)
+        self._names.invalidate(alias)
+        self._reads.flush(alias)
+        self._endpoints[alias] = (region_name, interface)
         self._cache.register(sess, alias=alias)
         return sess
 
@@ -62,264 +170,693 @@ class OpenStackKeywords(object):
         """Removes all the session objects"""
 
         self._cache.empty_cache()
+        self._clients.clear()
+        self._names.clear()
+        self._tokens.clear()
+        self._reads.flush()
+        self._endpoints.clear()
+
+    def set_name_index_ttl(self, ttl):
+        """ Set Name Index TTL: keep the projects, users and roles found by name for `ttl` seconds
+        Repeated `Get Project`, `Get User` and `Get Role` calls are then answered without a request.
+        A `ttl` of 0, the default, disables the index.
+        """
+        self._names.ttl = float(ttl)
+        if not self._names.ttl:
+            self._names.clear()
+
+    def configure_read_cache(self, ttl, max_size=256):
+        """ Configure Read Cache: keep the responses of the read keywords for `ttl` seconds
+        Covers the list keywords, `Get Role`, `Get Compute Usage` and `Get Hypervisor Statistics`, per alias.
+        `max_size` number of responses kept, the least recently used are dropped first
+        The keywords creating or deleting resources drop the cached responses they make stale.
+        A `ttl` of 0, the default, disables the cache.
+        """
+        self._reads.ttl = float(ttl)
+        self._reads.max_size = int(max_size)
+        self._reads.flush()
+
+    def flush_read_cache(self, alias=None):
+        """ Flush Read Cache: drop the cached responses of `alias`, or of all the sessions
+        """
+        self._reads.flush(alias)
+
+    def get_read_cache_statistics(self):
+        """ Get Read Cache Statistics: return the hits, misses, hit rate and size of the read cache per alias
+        """
+        return self._reads.statistics()
+
+    def run_without_read_cache(self, keyword, *args):
+        """ Run Without Read Cache: run a keyword of this library with fresh responses from the API
+        The responses still replace the cached ones.
+        """
+        method = self._keyword_method(keyword)
+        bypass = getattr(self._bypass_reads, 'enabled', False)
+        self._bypass_reads.enabled = True
+        try:
+            return method(*args)
+        finally:
+            self._bypass_reads.enabled = bypass
+
+    def _cached(self, alias, tag, key, fetch):
+        return self._reads.get(alias, tag, key, fetch, getattr(self._bypass_reads, 'enabled', False))
+
+    def _keyword_method(self, keyword):
+        return getattr(self, keyword.strip().lower().replace(' ', '_'))
+
+    def _as_list(self, value):
+        # keyword arguments given as a list or as comma separated values
+        if not value:
+            return []
+        if isinstance(value, (list, tuple)):
+            return list(value)
+        return [item.strip() for item in value.split(',')]
+
+    def get_client_pool_statistics(self):
+        """ Get Client Pool Statistics: return the hits, misses and size of the service client pool
+        """
+        stats = self._clients.statistics()
+        self.builtin.log('Client pool: %s' % stats, 'DEBUG')
+        return stats
+
+    def get_api_latency_report(self, group_by='keyword,alias'):
+        """ Get API Latency Report: return the latency of the OpenStack API requests sent so far
+        `group_by` comma separated fields out of keyword, alias, service, method, url and status
+        Returns one dictionary per group with the request count, the error count and the mean, p50, p95,
+        p99 and max latencies in milliseconds
+        """
+        return self._latency.report(self._report_fields(group_by))
+
+    def write_api_latency_report(self, path=None, group_by='keyword,alias', format=None):
+        """ Write API Latency Report: write the `Get API Latency Report` rows to a JSON or CSV file
+        `path` defaults to api-latency.json in the Robot Framework output directory
+        `format` json or csv, guessed from the file extension by default
+        """
+        if path is None:
+            path = os.path.join(self.builtin.get_variable_value('${OUTPUT DIR}', '.'), 'api-latency.json')
+        self.builtin.log('Writing API latency report: %s' % path, 'DEBUG')
+        return self._latency.write(path, self._report_fields(group_by), format)
+
+    def get_keyword_timing_report(self):
+        """ Get Keyword Timing Report: return, for each keyword of this library run so far, the number of calls,
+        the number of API requests sent and the wall clock and CPU seconds spent
+        """
+        return self._latency.keyword_report()
+
+    def reset_api_latency_report(self):
+        """ Reset API Latency Report: forget the latencies and keyword timings recorded so far
+        """
+        self._latency.reset()
+
+    def _report_fields(self, group_by):
+        return tuple(field.strip() for field in group_by.split(',') if field.strip())
+
+    def _get_client(self, alias, service, version, factory, interface_arg='interface'):
+        session = self._cache.switch(alias)
+        region_name, interface = self._endpoints.get(alias, (None, None))
+        # only pass the endpoint options that were set, and under the name the client expects
+        endpoint = {}
+        if region_name is not None:
+            endpoint['region_name'] = region_name
+        if interface is not None:
+            endpoint[interface_arg] = interface
+        return self._clients.get(alias, service, version, lambda: factory(session, endpoint))
+
+    def _keystone(self, alias):
+        return self._get_client(alias, 'identity', 3,
+                                lambda session, endpoint: ksclient.Client(session=session, **endpoint))
+
+    def _nova(self, alias):
+        return self._get_client(alias, 'compute', NOVA_API_VERSION,
+                                lambda session, endpoint: nvclient.Client(NOVA_API_VERSION, session=session, **endpoint),
+                                'endpoint_type')
+
+    def _neutron(self, alias):
+        return self._get_client(alias, 'network', 2,
+                                lambda session, endpoint: ntclient.Client(session=session, **endpoint),
+                                'endpoint_type')
+
+    def _heat(self, alias):
+        return self._get_client(alias, 'orchestration', HEAT_API_VERSION,
+                                lambda session, endpoint: htclient.Client(HEAT_API_VERSION, session=session, service_type='orchestration', **endpoint),
+                                'endpoint_type')
+
+    def _glance(self, alias):
+        return self._get_client(alias, 'image', GLANCE_API_VERSION,
+                                lambda session, endpoint: gcclient.Client(GLANCE_API_VERSION, session=session, **endpoint))
 
     def create_project(self, alias, project_name, domain='default'):
         self.builtin.log('Creating project: %s' % project_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        ks = ksclient.Client(session=session)
-        return ks.projects.create(project_name, domain)
+        ks = self._keystone(alias)
+        project = ks.projects.create(project_name, domain)
+        self._ledger.add(alias, 'projects', [(project.id, project.name)])
+        self._names.put(alias, 'project', domain, project)
+        return project
         
     def delete_project(self, alias, project_name):
         self.builtin.log('Deleting project: %s' % project_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        ks = ksclient.Client(session=session)
+        ks = self._keystone(alias)
         ks.projects.delete(project_name)
+        self._ledger.remove(alias, 'projects', [getattr(project_name, 'id', project_name)])
+        self._names.remove(alias, 'project', project_name)
 
     def get_project(self, alias, project_name, domain='default'):
         self.builtin.log('Getting project: %s' % project_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        ks = ksclient.Client(session=session)
-        projects = ks.projects.list(domain=domain)
-        for project in projects:
-            if project.name == project_name:
-                return project
-        return None
+        project = self._names.get(alias, 'project', domain, project_name)
+        if project is not None:
+            return project
+        ks = self._keystone(alias)
+        projects = ks.projects.list(domain=domain, name=project_name)
+        return self._find_by_name(alias, 'project', domain, projects, project_name)
+
+    def _find_by_name(self, alias, kind, scope, objs, name):
+        found = None
+        for obj in objs:
+            self._names.put(alias, kind, scope, obj)
+            if found is None and obj.name == name:
+                found = obj
+        return found
 
     def create_user(self, alias, user_name, project, domain='default', password=None, global_var_name=None):
         self.builtin.log('Creating user: %s' % user_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        ks = ksclient.Client(session=session)
+        ks = self._keystone(alias)
         if password is None:
-            password=''.join(random.SystemRandom().choice(string.ascii_uppercase + string.ascii_lowercase + string.digits) for _ in range(16))
+            password = self._generate_password()
         if global_var_name is not None:
             self.builtin.set_global_variable(global_var_name, password)
-        return ks.users.create(user_name, domain=domain, project=project, password=password)
+        user = ks.users.create(user_name, domain=domain, project=project, password=password)
+        self._ledger.add(alias, 'users', [(user.id, user.name)])
+        self._names.put(alias, 'user', None, user)
+        return user
+
+    def create_users(self, alias, user_name, count, project, domain='default', password=None, global_var_name=None,
+                     concurrency=DEFAULT_CONCURRENCY):
+        """ Create Users: create `count` users concurrently
+        `user_name` name template, `{index}` is replaced by the user number, otherwise `-<number>` is appended
+        `password` shared by all the users, a random one is generated if not given
+        Returns the created users in order (None for failures) and a list of per-user errors
+        """
+        names = expand_names(user_name, count)
+        self.builtin.log('Creating %s users: %s' % (len(names), user_name), 'DEBUG')
+        ks = self._keystone(alias)
+        if password is None:
+            password = self._generate_password()
+        if global_var_name is not None:
+            self.builtin.set_global_variable(global_var_name, password)
+        users, errors = run_parallel(
+            lambda name: ks.users.create(name, domain=domain, project=project, password=password),
+            names, concurrency)
+        self._ledger.add(alias, 'users', [(user.id, user.name) for user in users if user is not None])
+        for user in users:
+            self._names.put(alias, 'user', None, user)
+        return users, self._bulk_errors('user', names, errors)
     
     def get_user(self, alias, user_name, project_name):
         self.builtin.log('Getting user: %s of project %s' % (user_name, project_name), 'DEBUG')
-        session = self._cache.switch(alias)
-        ks = ksclient.Client(session=session)
-        users = ks.users.list(project=project_name)
-        for user in users:
-            if user.name == user_name:
-                return user
-        return None
+        # users are indexed by name alone: their names are unique in a domain, and the project is given
+        # as a name, an id or an object depending on the suite
+        user = self._names.get(alias, 'user', None, user_name)
+        if user is not None:
+            return user
+        ks = self._keystone(alias)
+        users = ks.users.list(project=project_name, name=user_name)
+        return self._find_by_name(alias, 'user', None, users, user_name)
+
+    def _generate_password(self):
+        return ''.join(random.SystemRandom().choice(string.ascii_uppercase + string.ascii_lowercase + string.digits) for _ in range(16))
 
     def delete_user(self, alias, user_id):
         self.builtin.log('Deleting user: %s' % user_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        ks = ksclient.Client(session=session)
+        ks = self._keystone(alias)
         ks.users.delete(user_id)
+        self._ledger.remove(alias, 'users', [getattr(user_id, 'id', user_id)])
+        self._names.remove(alias, 'user', user_id)
         
     def create_flavor(self, alias, flavor_name, ram=2048, vcpus=1, disk=20):
         self.builtin.log('Creating flavor: %s' % flavor_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
-        return nova.flavors.create(flavor_name, ram, vcpus, disk)
+        nova = self._nova(alias)
+        flavor = nova.flavors.create(flavor_name, ram, vcpus, disk)
+        self._ledger.add(alias, 'flavors', [(flavor.id, flavor.name)])
+        return flavor
     
     def delete_flavor(self, alias, flavor_id):
         self.builtin.log('Deleting flavor: %s' % flavor_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
+        nova = self._nova(alias)
         nova.flavors.delete(flavor_id)
+        self._ledger.remove(alias, 'flavors', [getattr(flavor_id, 'id', flavor_id)])
 
     def create_network(self, alias, network_name, physical_network=None, segmentation_id=None):
         self.builtin.log('Creating network: %s' % network_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         network = {'name': network_name, 'admin_state_up': True}
         if physical_network is not None:
             network['provider:physical_network']=physical_network
         if segmentation_id is not None:
             network['provider:segmentation_id ']=segmentation_id
-        return neutron.create_network({'network': network})
+        network = neutron.create_network({'network': network})
+        self._ledger.add(alias, 'networks', [(network['network']['id'], network_name)])
+        self._reads.invalidate('networks')
+        return network
 
     def create_subnet(self, alias, network_id, subnet_name, cidr, ip_version=4, enable_dhcp=True):
         self.builtin.log('Creating subnet: %s' % subnet_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         subnet = {"network_id": network_id, 'name': subnet_name, 'ip_version': ip_version, 'cidr': cidr, 'enable_dhcp': enable_dhcp}
-        return neutron.create_subnet({'subnet': subnet})
+        subnet = neutron.create_subnet({'subnet': subnet})
+        self._ledger.add(alias, 'subnets', [(subnet['subnet']['id'], subnet_name)])
+        self._reads.invalidate('subnets', 'networks')
+        return subnet
 
     def create_port(self, alias, port_name, network_id):
         self.builtin.log('Creating port: %s' % port_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         port = {"network_id": network_id, 'name': port_name, 'admin_state_up': True}
-        return neutron.create_port({'port': port})
+        port = neutron.create_port({'port': port})
+        self._ledger.add(alias, 'ports', [(port['port']['id'], port_name)])
+        self._reads.invalidate('ports')
+        return port
+
+    def create_networks(self, alias, network_name, count, physical_network=None, segmentation_id=None,
+                        concurrency=DEFAULT_CONCURRENCY, batch_size=NEUTRON_BULK_SIZE):
+        """ Create Networks: create `count` networks using neutron bulk requests
+        `network_name` name template, `{index}` is replaced by the network number, otherwise `-<number>` is appended
+        `concurrency` number of requests sent at the same time
+        `batch_size` number of networks in each bulk request
+        Returns the created networks in order (None for failures) and a list of per-network errors
+        """
+        names = expand_names(network_name, count)
+        self.builtin.log('Creating %s networks: %s' % (len(names), network_name), 'DEBUG')
+        networks = []
+        for name in names:
+            network = {'name': name, 'admin_state_up': True}
+            if physical_network is not None:
+                network['provider:physical_network']=physical_network
+            if segmentation_id is not None:
+                network['provider:segmentation_id']=segmentation_id
+            networks.append(network)
+        networks, errors = self._neutron_bulk_create(alias, 'network', networks, concurrency, batch_size)
+        return networks, self._bulk_errors('network', names, errors)
+
+    def create_ports(self, alias, port_name, network_id, count, concurrency=DEFAULT_CONCURRENCY,
+                     batch_size=NEUTRON_BULK_SIZE):
+        """ Create Ports: create `count` ports on `network_id` using neutron bulk requests
+        `port_name` name template, `{index}` is replaced by the port number, otherwise `-<number>` is appended
+        `concurrency` number of requests sent at the same time
+        `batch_size` number of ports in each bulk request
+        Returns the created ports in order (None for failures) and a list of per-port errors
+        """
+        names = expand_names(port_name, count)
+        self.builtin.log('Creating %s ports: %s' % (len(names), port_name), 'DEBUG')
+        ports = [{'network_id': network_id, 'name': name, 'admin_state_up': True} for name in names]
+        ports, errors = self._neutron_bulk_create(alias, 'port', ports, concurrency, batch_size)
+        return ports, self._bulk_errors('port', names, errors)
+
+    def _neutron_bulk_create(self, alias, resource, bodies, concurrency, batch_size):
+        neutron = self._neutron(alias)
+        self._reads.invalidate(resource + 's')
+        create = getattr(neutron, 'create_' + resource)
+        plural = resource + 's'
+        batch_size = int(batch_size)
+        batches = chunks(bodies, batch_size)
+        created, failed = run_parallel(lambda batch: create({plural: batch})[plural], batches, concurrency)
+        results = []
+        for batch, items in zip(batches, created):
+            results.extend(items if items is not None else [None] * len(batch))
+        # a bulk request is all or nothing, retry the failed batches one by one to get per-item errors
+        retry = [index * batch_size + i for index, batch, ex in failed for i in range(len(batch))]
+        if failed:
+            self.builtin.log('%s bulk requests failed, retrying %s %s individually' % (len(failed), len(retry), plural), 'DEBUG')
+        created, failed = run_parallel(lambda i: create({resource: bodies[i]})[resource], retry, concurrency)
+        for i, item in zip(retry, created):
+            results[i] = item
+        self._ledger.add(alias, plural, [(item['id'], item['name']) for item in results if item is not None])
+        return results, [(index, bodies[index], ex) for _, index, ex in failed]
+
+    def _bulk_errors(self, kind, names, errors):
+        rt = []
+        for index, item, ex in errors:
+            self.builtin.log('Creating %s %s failed: %s' % (kind, names[index], ex), 'WARN')
+            rt.append({'index': index, 'name': names[index], 'error': str(ex)})
+        return rt
 
     def list_networks(self, alias, project_id):
         self.builtin.log('Listing networks', 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         query = {"project_id": project_id}
-        return neutron.list_networks(retrieve_all=True, **query)
+        return self._cached(alias, 'networks', ('list_networks', project_id),
+                            lambda: neutron.list_networks(retrieve_all=True, **query))
 
     def list_subnets(self, alias, project_id):
         self.builtin.log('Listing subnets', 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         query = {"project_id": project_id}
-        return neutron.list_subnets(retrieve_all=True, **query)
+        return self._cached(alias, 'subnets', ('list_subnets', project_id),
+                            lambda: neutron.list_subnets(retrieve_all=True, **query))
 
     def list_ports(self, alias, project_id):
         self.builtin.log('Listing ports', 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         query = {"project_id": project_id}
-        return neutron.list_ports(retrieve_all=True, **query)
+        return self._cached(alias, 'ports', ('list_ports', project_id),
+                            lambda: neutron.list_ports(retrieve_all=True, **query))
 
     def list_security_groups(self, alias, project_id):
         self.builtin.log('Listing security groups', 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         query = {"project_id": project_id}
-        return neutron.list_security_groups(retrieve_all=True, **query)
+        return self._cached(alias, 'security_groups', ('list_security_groups', project_id),
+                            lambda: neutron.list_security_groups(retrieve_all=True, **query))
 
     def list_security_group_rules(self, alias, project_id):
         self.builtin.log('Listing security group rules', 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         query = {"project_id": project_id}
-        return neutron.list_security_group_rules(retrieve_all=True, **query)
+        return self._cached(alias, 'security_group_rules', ('list_security_group_rules', project_id),
+                            lambda: neutron.list_security_group_rules(retrieve_all=True, **query))
+
+    def get_project_inventory(self, alias, project_id):
+        """ Get Project Inventory: fetch the networks, subnets, ports, security groups, security group rules,
+        servers, stacks and compute limits of a project concurrently
+        Returns an inventory with `counts` per type, `limits`, and `get(type, id)` and `find(type, name)` lookups.
+        Only the fields needed by the inventory are requested from neutron.
+        """
+        self.builtin.log('Getting inventory of project: %s' % project_id, 'DEBUG')
+        neutron = self._neutron(alias)
+        nova = self._nova(alias)
+        heat = self._heat(alias)
+        inventory = Inventory()
+
+        def neutron_collection(kind):
+            fields = INVENTORY_FIELDS[kind]
+            # neutron only returns the link to the next page when a limit is sent
+            pages = getattr(neutron, 'list_' + kind)(retrieve_all=False, project_id=project_id, fields=list(fields),
+                                                     limit=NEUTRON_PAGE_SIZE)
+            inventory.add(kind, fields, (item for page in pages for item in page[kind]))
+
+        search_opts = {'project_id': project_id}
+        # all_tenants is admin only, it is not needed for the project of the session
+        if project_id != self._cache.switch(alias).get_project_id():
+            search_opts['all_tenants'] = True
+
+        def servers():
+            inventory.add('servers', INVENTORY_FIELDS['servers'], nova.servers.list(search_opts=search_opts, limit=-1))
+
+        def stacks():
+            inventory.add('stacks', INVENTORY_FIELDS['stacks'], self._list_stacks(heat, tenant_id=project_id))
+
+        def limits():
+            inventory.limits = dict((limit.name, limit.value) for limit in nova.limits.get(tenant_id=project_id).absolute)
+
+        fetches = [lambda kind=kind: neutron_collection(kind)
+                   for kind in ('networks', 'subnets', 'ports', 'security_groups', 'security_group_rules')]
+        fetches += [servers, stacks, limits]
+        results, errors = run_parallel(lambda fetch: fetch(), fetches, len(fetches))
+        if errors:
+            for index, fetch, ex in errors:
+                self.builtin.log('Getting inventory failed: %s' % ex, 'ERROR')
+            raise Exception('Inventory of project %s is incomplete' % project_id)
+        self.builtin.log('Inventory of project %s: %s' % (project_id, inventory), 'DEBUG')
+        return inventory
 
     def delete_port(self, alias, port_id):
         self.builtin.log('Deleting port: %s' % port_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         neutron.delete_port(port_id)
+        self._ledger.remove(alias, 'ports', [getattr(port_id, 'id', port_id)])
+        self._reads.invalidate('ports')
 
     def delete_subnet(self, alias, subnet_id):
         self.builtin.log('Deleting subnet: %s' % subnet_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         neutron.delete_subnet(subnet_id)
+        self._ledger.remove(alias, 'subnets', [getattr(subnet_id, 'id', subnet_id)])
+        self._reads.invalidate('subnets', 'networks')
 
     def delete_network(self, alias, network_id):
         self.builtin.log('Deleting network: %s' % network_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         neutron.delete_network(network_id)
+        self._ledger.remove(alias, 'networks', [getattr(network_id, 'id', network_id)])
+        self._reads.invalidate('networks', 'subnets', 'ports')
 
     def add_role_to_user(self, alias, role, user, project):
         self.builtin.log('Adding role %s to user %s of project %s' % (role,user,project), 'DEBUG')
-        session = self._cache.switch(alias)
-        ks = ksclient.Client(session=session)
+        ks = self._keystone(alias)
         ks.roles.grant(role, user=user, project=project)
         
     def get_role(self, alias, role_name):
         self.builtin.log('Getting role: %s' % role_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        ks = ksclient.Client(session=session)
-        roles = ks.roles.list()
-        for role in roles:
-            if role.name == role_name:
-                return role
-        return None
+        role = self._names.get(alias, 'role', None, role_name)
+        if role is not None:
+            return role
+        ks = self._keystone(alias)
+        roles = self._cached(alias, 'roles', ('get_role', role_name), lambda: ks.roles.list(name=role_name))
+        return self._find_by_name(alias, 'role', None, roles, role_name)
 
     def update_network_quota(self, alias, project_id, networks, subnets, ports, security_group, security_group_rule):
         self.builtin.log('Updating network quota: %s' % project_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        neutron = ntclient.Client(session=session)
+        neutron = self._neutron(alias)
         quota = {"network": networks, "port": ports, "subnet": subnets, "security_group": security_group, "security_group_rule": security_group_rule}
         neutron.update_quota(project_id, {'quota': quota})
 
     def update_compute_quota(self, alias, project_id, instances, cores, ram):
         self.builtin.log('Updating compute quota: %s' % project_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
+        nova = self._nova(alias)
         nova.quotas.update(project_id, instances=instances, cores=cores, ram=ram)
+        self._reads.invalidate('limits')
 
     def create_server_with_port(self, alias, server_name, image_uuid, flavor, security_group, key_name, port_id, user_data=None, zone='nova', config_drive=True):
         self.builtin.log('Creating servers: %s with port: %s' % (server_name,port_id), 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
+        nova = self._nova(alias)
         nets = []
         nets.append({"port-id":port_id})
         kwargs = {"max_count": 1, "min_count": 1, "key_name": key_name, "security_groups": [security_group], "nics": nets, "config_drive": config_drive, "availability_zone": zone}
         if user_data:
             kwargs["userdata"]=user_data
-        return nova.servers.create(server_name, image_uuid, flavor, **kwargs)
+        server = nova.servers.create(server_name, image_uuid, flavor, **kwargs)
+        self._ledger.add(alias, 'servers', [(server.id, server_name)])
+        self._reads.invalidate('ports', 'limits', 'hypervisors')
+        return server
 
     def create_servers(self, alias, server_name, image_uuid, flavor, count, security_group, networks, zone='nova', config_drive=True):
         self.builtin.log('Creating servers: %s, count: %s' % (server_name,count), 'DEBUG')
+        count = int(count)
         if count < 2:
             self.builtin.log('server count: %s, but it needs to be larger than 1.' % count, 'ERROR')
             raise Exception
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
+        nova = self._nova(alias)
         nets = []
         for network in networks:
             nets.append({"net-id":network})
         kwargs = {"max_count": count, "min_count": count, "security_groups": [security_group], "nics": nets, "config_drive": config_drive, "availability_zone": zone}
-        nova.servers.create(server_name, image_uuid, flavor, **kwargs)
+        # the servers are recorded by reservation, their ids are looked up by the cleanup
+        reservation_id = nova.servers.create(server_name, image_uuid, flavor, reservation_id=True, **kwargs)
+        self._ledger.add(alias, 'reservations', [(str(reservation_id), server_name)])
+        self._reads.invalidate('ports', 'limits', 'hypervisors')
 
-    def check_servers(self, alias, server_name, console, timeout):
+    def check_servers(self, alias, server_name, console, timeout, regex=False):
+        """ Check Servers: wait until the servers named `server_name`-* are ACTIVE and `console` shows up in their console log
+        `regex` treat `console` as a regular expression
+        Statuses of all the servers are fetched with a single list call per poll and console logs are only
+        fetched, concurrently and tail-limited, for ACTIVE servers that have not booted yet. Only the console
+        lines printed since the previous poll are scanned.
+        Per-server timings are available through `Get Server Timings`.
+        """
         self.builtin.log('Checking servers: %s' % server_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
-        servers = nova.servers.list(search_opts={"name": server_name + "-*"})
-        start_timestamp = int(datetime.datetime.now().strftime("%s"))
-        current_timestamp = int(datetime.datetime.now().strftime("%s"))
+        nova = self._nova(alias)
+        search_opts = {"name": server_name + "-*"}
+        pending = dict((svr.id, svr) for svr in nova.servers.list(search_opts=search_opts))
+        start_timestamp = time.time()
+        deadline = start_timestamp + int(timeout)
+        timings = dict((server_id, {'name': svr.name, 'active': None, 'console': None}) for server_id, svr in pending.items())
         ready = []
         errors = []
-        while current_timestamp - start_timestamp < timeout and len(servers) > 0:
-            for svr in servers:
-                server = nova.servers.get(svr.id)
+        watch = ConsoleWatch(console, regex, TAIL_LINES)
+        backoff = Backoff()
+        while pending:
+            progress = False
+            active = []
+            for server in nova.servers.list(detailed=True, search_opts=search_opts):
+                if server.id not in pending:
+                    continue
                 self.builtin.log('server: %s, status: %s' % (server.id, server.status), 'DEBUG')
                 if server.status == "ACTIVE":
-                    console_log = server.get_console_output()
-                    #self.builtin.log('console log of %s: %s' % (server.id, console_log[-30:]), 'DEBUG')
-                    if console in console_log:
-                        self.builtin.log('%s is active and booted. time left: %s' % (server.id, current_timestamp - start_timestamp), 'DEBUG')
-                        ready.append(server)
-                elif server.status == "ERROR" or getattr(server,"OS-EXT-STS:vm_state") == "error":
-                    self.builtin.log('%s is in error state. time elapsed: %s' % (server.id, current_timestamp - start_timestamp), 'DEBUG')
+                    if timings[server.id]['active'] is None:
+                        timings[server.id]['active'] = time.time() - start_timestamp
+                        progress = True
+                    active.append(server)
+                elif server.status == "ERROR" or getattr(server, "OS-EXT-STS:vm_state", None) == "error":
+                    self.builtin.log('%s is in error state. time elapsed: %s' % (server.id, time.time() - start_timestamp), 'DEBUG')
                     errors.append(server)
-            for server in ready:
-                if server in servers:
-                    servers.remove(server)
-            for server in errors:
-                if server in servers:
-                    servers.remove(server)
-            time.sleep(10)
-            current_timestamp = int(datetime.datetime.now().strftime("%s"))
-        failed = False
+                    del pending[server.id]
+                    progress = True
+            booted, failed = run_parallel(
+                lambda server: watch.poll(server.id, lambda length: server.get_console_output(length=length)), active)
+            for index, server, ex in failed:
+                self.builtin.log('Getting console log of %s failed: %s' % (server.id, ex), 'DEBUG')
+            for server, found in zip(active, booted):
+                if found:
+                    elapsed = time.time() - start_timestamp
+                    self.builtin.log('%s is active and booted. time elapsed: %s' % (server.id, elapsed), 'DEBUG')
+                    timings[server.id]['console'] = elapsed
+                    ready.append(server)
+                    del pending[server.id]
+                    progress = True
+            if not pending or time.time() >= deadline:
+                break
+            if progress:
+                backoff.reset()
+            backoff.wait(deadline)
+        self._server_timings = timings
         if len(errors) > 0:
             self.builtin.log('%s servers are in error state.' % len(errors), 'ERROR')
-        if len(servers) > 0:
-            self.builtin.log('Creation of %s servers has timed out.' % len(servers), 'ERROR')
-        if failed:
-            raise Exception
+        if len(pending) > 0:
+            self.builtin.log('Creation of %s servers has timed out.' % len(pending), 'ERROR')
         return ready
 
+    def wait_for_console_marker(self, alias, server_ids, marker, timeout, regex=False, concurrency=DEFAULT_CONCURRENCY):
+        """ Wait For Console Marker: wait until `marker` shows up in the console log of every server of `server_ids`
+        `server_ids` list or comma separated server ids
+        `regex` treat `marker` as a regular expression
+        Console logs are fetched tail-limited, only the lines printed since the previous poll are scanned and a
+        server is no longer polled once its marker has been seen.
+        Returns the seconds each server took to show the marker, fails with the servers left when `timeout` expires.
+        """
+        server_ids = self._as_list(server_ids)
+        self.builtin.log('Waiting for %s in the console of %s servers' % (marker, len(server_ids)), 'DEBUG')
+        nova = self._nova(alias)
+        watch = ConsoleWatch(marker, regex, TAIL_LINES)
+        start_timestamp = time.time()
+        deadline = start_timestamp + int(timeout)
+        pending = list(server_ids)
+        timings = OrderedDict((server_id, None) for server_id in server_ids)
+        backoff = Backoff()
+        while pending:
+            booted, failed = run_parallel(
+                lambda server_id: watch.poll(server_id, lambda length: nova.servers.get_console_output(server_id, length=length)),
+                pending, concurrency)
+            for index, server_id, ex in failed:
+                self.builtin.log('Getting console log of %s failed: %s' % (server_id, ex), 'DEBUG')
+            found = [server_id for server_id, seen in zip(pending, booted) if seen]
+            for server_id in found:
+                timings[server_id] = time.time() - start_timestamp
+                pending.remove(server_id)
+            if not pending or time.time() >= deadline:
+                break
+            if found:
+                backoff.reset()
+            backoff.wait(deadline)
+        if pending:
+            self.builtin.log('%s not seen in the console of %s servers.' % (marker, len(pending)), 'ERROR')
+            raise Exception('console marker not seen on: %s' % ', '.join(pending))
+        return timings
+
+    def get_server_timings(self):
+        """ Get Server Timings: return the time-to-ACTIVE and time-to-console-marker in seconds of each server
+        seen by the last `Check Servers`, keyed by server id. None means the state was not reached.
+        """
+        return self._server_timings
+
     def delete_servers(self, alias, server_name, timeout):
+        """ Delete Servers: delete the servers named `server_name`-* and wait until they are gone
+        Fails with the names of the servers left when `timeout` expires.
+        """
         self.builtin.log('Deleting servers: %s' % server_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
-        servers = nova.servers.list(search_opts={"name": server_name + "-*"})
-        start_timestamp = int(datetime.datetime.now().strftime("%s"))
-        current_timestamp = int(datetime.datetime.now().strftime("%s"))
-        deleted = []
-        while current_timestamp - start_timestamp < timeout and len(servers) > 0:
-            for server in servers:
-                try:
-                    self.builtin.log('delete server %s ...' % server.id, 'DEBUG')
-                    nova.servers.delete(server)
-                except NotFound as ex:
-                    self.builtin.log('%s is deleted. time elapsed: %s' % (server.id, current_timestamp - start_timestamp), 'DEBUG')
-                    deleted.append(server)
-            for server in deleted:
-                if server in servers:
-                    servers.remove(server)
-            time.sleep(10)
-            current_timestamp = int(datetime.datetime.now().strftime("%s"))
+        nova = self._nova(alias)
+        search_opts = {"name": server_name + "-*"}
+        servers = dict((server.id, server.name) for server in nova.servers.list(search_opts=search_opts))
+        try:
+            self._teardown(alias, 'servers', servers, nova.servers.delete,
+                           lambda: [server.id for server in nova.servers.list(search_opts=search_opts)],
+                           timeout, nvexceptions.NotFound)
+        finally:
+            self._reads.invalidate('ports', 'limits', 'hypervisors')
+
+    def run_load_profile(self, keyword, profile, duration, rate, *args, **kwargs):
+        """ Run Load Profile: call a keyword of this library following a load profile, open loop
+        `keyword` name of the keyword, e.g. Create Server With Port
+        `profile` constant, ramp, step or burst
+        `duration` length of the run in seconds
+        `rate` operations per second, the start rate for ramp and step, bursts per second for burst
+        `args` arguments of the keyword, `{index}` in them is replaced by the operation number
+        Named arguments: `end_rate` for ramp and step, `steps` for step, `burst_size` for burst,
+        `concurrency` maximum number of operations running at once (default 50) and `window` the
+        length in seconds of the timeline intervals (default 1). The other named arguments are passed
+        to the keyword, with `{index}` replaced as well.
+        Returns the achieved throughput, error rate, maximum queue delay and a timeline of them per window.
+        """
+        concurrency = kwargs.pop('concurrency', 50)
+        window = kwargs.pop('window', 1)
+        options = dict((name, kwargs.pop(name)) for name in ('end_rate', 'steps', 'burst_size') if name in kwargs)
+        offsets = loadprofile.schedule(profile, duration, rate, **options)
+        method = self._keyword_method(keyword)
+        self.builtin.log('Running %s: %s operations with profile %s' % (keyword, len(offsets), profile), 'DEBUG')
+
+        def operation(index):
+            # not isinstance(arg, str): robot passes unicode arguments on python 2
+            number = str(index + 1)
+            method(*[arg.replace('{index}', number) if hasattr(arg, 'replace') else arg for arg in args],
+                   **dict((name, value.replace('{index}', number) if hasattr(value, 'replace') else value)
+                          for name, value in kwargs.items()))
+
+        samples = loadprofile.run_schedule(operation, offsets, concurrency)
+        result = loadprofile.summarize(samples, window)
+        for scheduled, started, finished, error in samples:
+            if error is not None:
+                self.builtin.log('%s failed: %s' % (keyword, error), 'DEBUG')
+        self.builtin.log('%s: %s operations, %s errors, %.2f ops/s, max queue delay %.2f s' % (
+            keyword, result['operations'], result['errors'], result['throughput'], result['max_queue_delay']))
+        return result
+
+    def run_keyword_on_aliases(self, keyword, aliases, *args):
+        """ Run Keyword On Aliases: run a keyword of this library on several sessions in parallel
+        `keyword` name of the keyword, its first argument must be the alias
+        `aliases` list or comma separated aliases, all the sessions if empty
+        `args` the other arguments of the keyword
+        Returns, keyed by alias, the `result` of the keyword, its `error` (None if it passed) and the
+        `elapsed` seconds. A failure on one alias does not stop the others.
+        """
+        method = self._keyword_method(keyword)
+        aliases = self._as_list(aliases) or list(self._endpoints)
+        self.builtin.log('Running %s on %s' % (keyword, ', '.join(aliases)), 'DEBUG')
+
+        def run(alias):
+            start_timestamp = time.time()
+            try:
+                return {'result': method(alias, *args), 'error': None, 'elapsed': time.time() - start_timestamp}
+            except Exception as ex:
+                return {'result': None, 'error': str(ex), 'elapsed': time.time() - start_timestamp}
+
+        results, errors = run_parallel(run, aliases, len(aliases) or 1)
+        rt = OrderedDict()
+        for alias, result in zip(aliases, results):
+            rt[alias] = result
+            if result['error'] is not None:
+                self.builtin.log('%s failed on %s: %s' % (keyword, alias, result['error']), 'WARN')
+            self.builtin.log('%s on %s: %.2f seconds' % (keyword, alias, result['elapsed']), 'DEBUG')
+        return rt
+
+    def get_compute_usage_on_all(self, project_id, aliases=None):
+        """ Get Compute Usage On All: run `Get Compute Usage` on several sessions in parallel, see `Run Keyword On Aliases`
+        """
+        return self.run_keyword_on_aliases('get_compute_usage', aliases, project_id)
+
+    def get_hypervisor_statistics_on_all(self, aliases=None):
+        """ Get Hypervisor Statistics On All: run `Get Hypervisor Statistics` on several sessions in parallel, see
+        `Run Keyword On Aliases`
+        """
+        return self.run_keyword_on_aliases('get_hypervisor_statistics', aliases)
+
+    def check_servers_on_aliases(self, aliases, server_name, console, timeout, regex=False):
+        """ Check Servers On Aliases: run `Check Servers` on several sessions in parallel, see `Run Keyword On Aliases`
+        """
+        return self.run_keyword_on_aliases('check_servers', aliases, server_name, console, timeout, regex)
 
     def get_compute_usage(self, alias, project_id):
         self.builtin.log('Getting compute usage for project: %s' % project_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
-        limits = nova.limits.get(tenant_id=project_id)
+        nova = self._nova(alias)
+        limits = self._cached(alias, 'limits', ('get_compute_usage', project_id),
+                              lambda: nova.limits.get(tenant_id=project_id))
         rt = {}
         for limit in limits.absolute:
             rt[limit.name] = limit.value
@@ -327,94 +864,307 @@ class OpenStackKeywords(object):
 
     def create_stacks(self, alias, project_id, template, stack_name, num_stacks = 1):
         self.builtin.log('Creating %s stacks' % num_stacks, 'DEBUG')
-        session = self._cache.switch(alias)
-        heat = htclient.Client(HEAT_API_VERSION, session=session, service_type='orchestration')
+        heat = self._heat(alias)
         stacks=[]
         for i in range(1,int(num_stacks)+1):
             fields = {'tenant_id': project_id, 'stack_name': stack_name+'-'+str(i), 'template': template}
-            stacks.append(heat.stacks.create(**fields))
+            stack = heat.stacks.create(**fields)
+            self._ledger.add(alias, 'stacks', [(stack['stack']['id'], fields['stack_name'])])
+            stacks.append(stack)
         return stacks
     
     def check_stacks(self, alias, project_id, stack_name, timeout):
+        """ Check Stacks: wait until the stacks named `stack_name`-* are created and return how many there are
+        After the first listing, each poll only asks heat for the stacks in progress, and the stacks that left
+        that state are fetched by name. Fails with the names and reasons of the failed stacks, or with the
+        names of the stacks still in progress when `timeout` expires.
+        Per-stack create durations are available through `Get Stack Timings`.
+        """
         self.builtin.log('Checking stacks: %s' % stack_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        heat = htclient.Client(HEAT_API_VERSION, session=session, service_type='orchestration')
-        start_timestamp = int(datetime.datetime.now().strftime("%s"))
-        current_timestamp = int(datetime.datetime.now().strftime("%s"))
-        completed = False
+        heat = self._heat(alias)
+        start_timestamp = time.time()
+        deadline = start_timestamp + int(timeout)
         body = {'tenant_id': project_id}
-        while current_timestamp - start_timestamp < timeout and not completed:
-            stacks = heat.stacks.list(**body)
-            total_stacks = 0
-            completed_stacks = 0
-            failed_stacks = 0
+        stacks = [stack for stack in self._list_stacks(heat, **body) if str(stack.stack_name).startswith(stack_name+'-')]
+        pending = dict((stack.id, stack.stack_name) for stack in stacks)
+        timings = dict((stack.stack_name, None) for stack in stacks)
+        completed = []
+        failed = {}
+        backoff = Backoff(maximum=5)
+
+        def update(stacks):
             for stack in stacks:
-                if str(stack.stack_name).startswith(stack_name+'-'):
-                    total_stacks += 1
-                    if stack.status == "COMPLETE":
-                        completed_stacks += 1
-                    elif stack.status == "FAILED":
-                        failed_stacks += 1
-            if total_stacks == completed_stacks:
-                completed = True
-            elif failed_stacks == total_stacks or total_stacks == failed_stacks+completed_stacks:
-                raise Exception
-            else:
-                time.sleep(5)
-                current_timestamp = int(datetime.datetime.now().strftime("%s"))
-        if not completed:
-            raise Exception
-        return completed_stacks
-                
+                if stack.id not in pending or stack.status not in ("COMPLETE", "FAILED"):
+                    continue
+                del pending[stack.id]
+                timings[stack.stack_name] = time.time() - start_timestamp
+                if stack.status == "COMPLETE":
+                    completed.append(stack.stack_name)
+                else:
+                    failed[stack.stack_name] = getattr(stack, 'stack_status_reason', None)
+                    self.builtin.log('%s failed: %s' % (stack.stack_name, failed[stack.stack_name]), 'DEBUG')
+
+        update(stacks)
+        while pending and time.time() < deadline:
+            backoff.wait(deadline)
+            in_progress = set(stack.id for stack in self._list_stacks(heat, filters={'status': 'IN_PROGRESS'}, **body))
+            finished = [name for stack_id, name in pending.items() if stack_id not in in_progress]
+            if finished:
+                backoff.reset()
+                for names in chunks(finished, STACK_PAGE_SIZE):
+                    update(self._list_stacks(heat, filters={'name': names}, **body))
+            self.builtin.log('stacks completed: %s, failed: %s, in progress: %s' % (len(completed), len(failed), len(pending)), 'DEBUG')
+        self._stack_timings = timings
+        if failed:
+            self.builtin.log('%s stacks have failed.' % len(failed), 'ERROR')
+            raise Exception('stacks failed: %s' % ', '.join('%s (%s)' % (name, failed[name]) for name in sorted(failed)))
+        if pending:
+            self.builtin.log('Creation of %s stacks has timed out.' % len(pending), 'ERROR')
+            raise Exception('stacks not completed: %s' % ', '.join(sorted(pending.values())))
+        return len(completed)
+
+    def get_stack_timings(self):
+        """ Get Stack Timings: return the seconds each stack took to complete or fail in the last `Check Stacks`,
+        keyed by stack name. None means the stack was still in progress.
+        """
+        return self._stack_timings
+
+    def _list_stacks(self, heat, **params):
+        marker = None
+        while True:
+            page = list(heat.stacks.list(limit=STACK_PAGE_SIZE, marker=marker, **params))
+            for stack in page:
+                yield stack
+            if len(page) < STACK_PAGE_SIZE:
+                break
+            marker = page[-1].id
+
     def delete_stacks(self, alias, project_id, stack_name, timeout):
+        """ Delete Stacks: delete the stacks named `stack_name`-* and wait until they are gone
+        Fails with the names of the stacks left when `timeout` expires.
+        """
         self.builtin.log('Deleting stacks: %s' % stack_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        heat = htclient.Client(HEAT_API_VERSION, session=session, service_type='orchestration')
-        start_timestamp = int(datetime.datetime.now().strftime("%s"))
-        current_timestamp = int(datetime.datetime.now().strftime("%s"))
-        completed = False
+        heat = self._heat(alias)
         body = {'tenant_id': project_id}
-        while current_timestamp - start_timestamp < timeout and not completed:
-            stacks = heat.stacks.list(**body)
-            total_stacks = 0
-            for stack in stacks:
-                if str(stack.stack_name).startswith(stack_name+'-'):
-                    total_stacks += 1
-                    stack.delete()
-            if total_stacks > 0:
-                time.sleep(5)
-                current_timestamp = int(datetime.datetime.now().strftime("%s"))
-            else:
-                completed = True
+        def list_stacks():
+            return [stack for stack in self._list_stacks(heat, **body) if str(stack.stack_name).startswith(stack_name+'-')]
+        stacks = dict((stack.id, stack.stack_name) for stack in list_stacks())
+        self._teardown(alias, 'stacks', stacks, heat.stacks.delete,
+                       lambda: [stack.id for stack in list_stacks()],
+                       timeout, htexc.HTTPNotFound)
+
+    def _teardown(self, alias, kind, resources, delete, list_remaining, timeout, not_found):
+        start_timestamp = time.time()
+        latencies, leftovers, errors = delete_and_wait(resources, delete, list_remaining, timeout, not_found)
+        self._ledger.remove(alias, kind, latencies)
+        for resource_id, ex in errors:
+            self.builtin.log('Deleting %s failed: %s' % (resources[resource_id], ex), 'WARN')
+        self._deletion_timings = dict((resources[resource_id], latency) for resource_id, latency in latencies.items())
+        self.builtin.log('Deleted %s %s in %.1f seconds' % (len(latencies), kind, time.time() - start_timestamp), 'DEBUG')
+        if leftovers:
+            self.builtin.log('Deletion of %s %s has timed out.' % (len(leftovers), kind), 'ERROR')
+        if leftovers or errors:
+            names = ', '.join(sorted(str(resources[resource_id]) for resource_id in list(leftovers) + [e[0] for e in errors]))
+            raise Exception('%s not deleted: %s' % (kind, names))
+
+    def get_deletion_timings(self):
+        """ Get Deletion Timings: return the seconds each resource took to disappear in the last `Delete Servers` or
+        `Delete Stacks`, keyed by resource name
+        """
+        return self._deletion_timings
+
+    def set_resource_ledger(self, path):
+        """ Set Resource Ledger: keep the record of the created resources in the file `path`
+        The resources recorded in an existing file, e.g. left behind by a run that was aborted, are loaded and
+        deleted by the next `Cleanup Created Resources`. Resources created so far are kept in the ledger.
+        Returns the number of resources recorded.
+        """
+        ledger = Ledger(path)
+        for (alias, kind), resources in self._ledger.entries().items():
+            ledger.add(alias, kind, resources.items())
+        self._ledger = ledger
+        self.builtin.log('Resource ledger %s: %s' % (path, ledger.counts()), 'DEBUG')
+        return len(ledger)
+
+    def get_created_resources(self):
+        """ Get Created Resources: return the number of resources recorded in the resource ledger per type
+        """
+        return self._ledger.counts()
+
+    def cleanup_created_resources(self, timeout=600, aliases=None, concurrency=DEFAULT_CONCURRENCY):
+        """ Cleanup Created Resources: delete the resources recorded by the create keywords
+        Resources are deleted tier by tier: servers and stacks, then ports, images, keypairs and flavors,
+        then subnets, then networks, then users, then projects. The deletes of a tier are sent concurrently and the servers
+        and stacks are waited for before the next tier starts.
+        `aliases` list or comma separated aliases whose resources are deleted, all of them if empty; their
+        sessions must exist
+        Deleted resources, and those already gone, leave the ledger at once, so after a crash the cleanup
+        resumes from the ledger file loaded with `Set Resource Ledger`.
+        Fails with the resources whose delete failed or that were still there when `timeout` expired.
+        """
+        aliases = self._as_list(aliases)
+        start_timestamp = time.time()
+        deadline = start_timestamp + int(timeout)
+        self._resolve_reservations(aliases or None, concurrency)
+        left = []
+        for tier in CLEANUP_TIERS:
+            groups = list(self._ledger.entries(tier, aliases or None).items())
+            if not groups:
+                continue
+            self.builtin.log('Deleting %s' % ', '.join('%s %s of %s' % (len(resources), kind, alias)
+                                                      for (alias, kind), resources in groups), 'DEBUG')
+            results, errors = run_parallel(
+                lambda group: self._cleanup(group[0][0], group[0][1], group[1], deadline, concurrency),
+                groups, len(groups))
+            for index, ((alias, kind), resources), ex in errors:
+                self.builtin.log('Deleting %s of %s failed: %s' % (kind, alias, ex), 'WARN')
+                left.extend('%s %s' % (kind[:-1], name) for name in resources.values())
+            for names in results:
+                left.extend(names or [])
+        self._names.clear()
+        self._reads.flush()
+        self._ledger.compact()
+        self.builtin.log('Cleaned up created resources in %.1f seconds' % (time.time() - start_timestamp), 'DEBUG')
+        if left:
+            self.builtin.log('Cleanup of %s resources has failed.' % len(left), 'ERROR')
+            raise Exception('resources not deleted: %s' % ', '.join(left))
+
+    def _resolve_reservations(self, aliases, concurrency):
+        reservations = [(alias, reservation_id)
+                        for (alias, kind), resources in self._ledger.entries(('reservations',), aliases).items()
+                        for reservation_id in resources]
+
+        def resolve(reservation):
+            alias, reservation_id = reservation
+            servers = self._nova(alias).servers.list(detailed=False, search_opts={'reservation_id': reservation_id})
+            self._ledger.add(alias, 'servers', [(server.id, server.name) for server in servers])
+            self._ledger.remove(alias, 'reservations', [getattr(reservation_id, 'id', reservation_id)])
+
+        results, errors = run_parallel(resolve, reservations, concurrency)
+        for index, (alias, reservation_id), ex in errors:
+            self.builtin.log('Listing the servers of reservation %s failed: %s' % (reservation_id, ex), 'WARN')
+
+    def _cleanup(self, alias, kind, resources, deadline, concurrency):
+        delete, list_remaining, not_found = self._cleanup_actions(alias, kind)
+        # a resource whose delete failed stays in the ledger
+        latencies, leftovers, errors = delete_and_wait(resources, delete, list_remaining,
+                                                       max(0, deadline - time.time()), not_found, concurrency)
+        self._ledger.remove(alias, kind, latencies)
+        for resource_id, ex in errors:
+            self.builtin.log('Deleting %s %s failed: %s' % (kind[:-1], resources[resource_id], ex), 'WARN')
+        if leftovers:
+            self.builtin.log('Deletion of %s %s has timed out.' % (len(leftovers), kind), 'ERROR')
+        return ['%s %s' % (kind[:-1], resources[resource_id]) for resource_id in list(leftovers) + [e[0] for e in errors]]
+
+    def _cleanup_actions(self, alias, kind):
+        # returns the delete function, the listing of what is left for the asynchronous deletes and the not found error
+        if kind == 'servers':
+            nova = self._nova(alias)
+            return nova.servers.delete, lambda: [server.id for server in nova.servers.list(detailed=False)], nvexceptions.NotFound
+        if kind == 'stacks':
+            heat = self._heat(alias)
+            return heat.stacks.delete, lambda: [stack.id for stack in self._list_stacks(heat)], htexc.HTTPNotFound
+        if kind in ('keypairs', 'flavors'):
+            return getattr(self._nova(alias), kind).delete, lambda: (), nvexceptions.NotFound
+        if kind in ('ports', 'subnets', 'networks'):
+            return getattr(self._neutron(alias), 'delete_' + kind[:-1]), lambda: (), ntexceptions.NotFound
+        if kind == 'images':
+            return self._glance(alias).images.delete, lambda: (), gcexc.HTTPNotFound
+        if kind in ('users', 'projects'):
+            return getattr(self._keystone(alias), kind).delete, lambda: (), ksexceptions.NotFound
+        raise Exception('Unknown resource type: %s' % kind)
 
     def get_hypervisor_statistics(self, alias):
         self.builtin.log('Getting hypervisor statistics', 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
-        return nova.hypervisors.statistics()
+        nova = self._nova(alias)
+        return self._cached(alias, 'hypervisors', ('get_hypervisor_statistics',), nova.hypervisors.statistics)
 
-    def create_image(self, alias, image_name, image_path, disk_format='qcow2', container_format='bare'):
+    def create_image(self, alias, image_name, image_path, disk_format='qcow2', container_format='bare',
+                     chunk_size=CHUNK_SIZE, verify_checksum=False):
+        """ Create Image: create an image and stream the content of `image_path` to it
+        `chunk_size` size in bytes of the chunks read from the file
+        `verify_checksum` compare the checksum computed by glance with the one of the file
+        """
         self.builtin.log('Creating image %s' % image_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        glance = gcclient.Client(GLANCE_API_VERSION, session=session)
-        image = glance.images.create(name=image_name, disk_format=disk_format, container_format=container_format)
-        glance.images.upload(image.id, open(image_path, 'rb'))
+        with ImageSource(image_path, chunk_size) as source:
+            image, elapsed = self._upload_image(alias, image_name, source, disk_format, container_format)
+            self._log_upload(image_name, source, elapsed)
+            if verify_checksum:
+                self._verify_image_checksum(alias, image, source)
         return image
+
+    def create_images(self, alias, image_name, image_path, count, disk_format='qcow2', container_format='bare',
+                      concurrency=4, chunk_size=CHUNK_SIZE, verify_checksum=False):
+        """ Create Images: create `count` images with the content of `image_path`, uploaded concurrently
+        `image_name` name template, `{index}` is replaced by the image number, otherwise `-<number>` is appended
+        `concurrency` number of uploads at the same time, they share a single read of the file
+        Returns the created images in order (None for failures) and a list of per-image errors
+        """
+        names = expand_names(image_name, count)
+        self.builtin.log('Creating %s images: %s' % (len(names), image_name), 'DEBUG')
+        with ImageSource(image_path, chunk_size) as source:
+            uploads, errors = run_parallel(
+                lambda name: self._upload_image(alias, name, source, disk_format, container_format),
+                names, concurrency)
+            images = []
+            for name, upload in zip(names, uploads):
+                if upload is None:
+                    images.append(None)
+                    continue
+                image, elapsed = upload
+                self._log_upload(name, source, elapsed)
+                if verify_checksum:
+                    self._verify_image_checksum(alias, image, source)
+                images.append(image)
+        return images, self._bulk_errors('image', names, errors)
+
+    def _upload_image(self, alias, image_name, source, disk_format, container_format):
+        glance = self._glance(alias)
+        image = glance.images.create(name=image_name, disk_format=disk_format, container_format=container_format)
+        self._ledger.add(alias, 'images', [(image.id, image_name)])
+        start_timestamp = time.time()
+        glance.images.upload(image.id, source.reader(), image_size=source.size)
+        return image, time.time() - start_timestamp
+
+    def _log_upload(self, image_name, source, elapsed):
+        rate = source.size / (1024.0 * 1024.0) / elapsed if elapsed > 0 else 0
+        self.builtin.log('Uploaded image %s: %s bytes in %.1f seconds, %.1f MB/s' % (image_name, source.size, elapsed, rate))
+
+    def _verify_image_checksum(self, alias, image, source):
+        checksum = self._glance(alias).images.get(image.id).checksum
+        expected = source.compute_checksum()
+        if checksum != expected:
+            self.builtin.log('Checksum of image %s is %s, expected %s' % (image.id, checksum, expected), 'ERROR')
+            raise Exception('Checksum mismatch for image %s' % image.id)
     
     def delete_image(self, alias, image_id):
         self.builtin.log('Deleting image %s' % image_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        glance = gcclient.Client(GLANCE_API_VERSION, session=session)
+        glance = self._glance(alias)
         glance.images.delete(image_id)
+        self._ledger.remove(alias, 'images', [getattr(image_id, 'id', image_id)])
 
     def create_keypair(self, alias, key_name, public_key):
         self.builtin.log('Creating keypair: %s' % key_name, 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
-        return nova.keypairs.create(key_name, public_key)
+        nova = self._nova(alias)
+        keypair = nova.keypairs.create(key_name, public_key)
+        self._ledger.add(alias, 'keypairs', [(keypair.id, keypair.name)])
+        return keypair
+
+    def create_keypairs(self, alias, key_name, count, public_key, concurrency=DEFAULT_CONCURRENCY):
+        """ Create Keypairs: create `count` keypairs sharing `public_key` concurrently
+        `key_name` name template, `{index}` is replaced by the keypair number, otherwise `-<number>` is appended
+        Returns the created keypairs in order (None for failures) and a list of per-keypair errors
+        """
+        names = expand_names(key_name, count)
+        self.builtin.log('Creating %s keypairs: %s' % (len(names), key_name), 'DEBUG')
+        nova = self._nova(alias)
+        keypairs, errors = run_parallel(lambda name: nova.keypairs.create(name, public_key), names, concurrency)
+        self._ledger.add(alias, 'keypairs', [(keypair.id, keypair.name) for keypair in keypairs if keypair is not None])
+        return keypairs, self._bulk_errors('keypair', names, errors)
 
     def delete_keypair(self, alias, keypair_id):
         self.builtin.log('Deleting keypair: %s' % keypair_id, 'DEBUG')
-        session = self._cache.switch(alias)
-        nova = nvclient.Client(NOVA_API_VERSION, session=session)
-        return nova.keypairs.delete(keypair_id)
+        nova = self._nova(alias)
+        rt = nova.keypairs.delete(keypair_id)
+        self._ledger.remove(alias, 'keypairs', [getattr(keypair_id, 'id', keypair_id)])
+        return rt
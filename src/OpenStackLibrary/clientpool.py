@@ -0,0 +1,43 @@
+import threading
+
+
+class ClientPool(object):
+    """Per-alias cache of OpenStack service clients.
+
+    Clients are keyed on (alias, service, api version) and share the
+    keystoneauth session registered for the alias, so the session's HTTP
+    connection pool and endpoint catalog are reused across keywords.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, alias, service, version, factory):
+        key = (alias, service, version)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            client = factory()
+            self._clients[key] = client
+            return client
+
+    def invalidate(self, alias):
+        with self._lock:
+            for key in [k for k in self._clients if k[0] == alias]:
+                del self._clients[key]
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def statistics(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._clients)}
@@ -0,0 +1,58 @@
+import re
+
+TAIL_LINES = 200
+MAX_TAIL_LINES = 3200
+# lines remembered per server to find where the previous poll stopped
+OVERLAP_LINES = 3
+
+
+class ConsoleWatch(object):
+    """Watches the console logs of servers for a boot marker.
+
+    The first poll of a server asks for the last `max_length` lines, so a
+    marker printed long before is still found. Later polls ask for the last
+    `length` lines only and scan the lines printed since the previous poll
+    of the same server, found by matching the last lines seen then. When they are not in the new output, more
+    lines were printed than asked for: everything is scanned and the next
+    polls ask for twice as many lines, up to `max_length`.
+    """
+
+    def __init__(self, marker, regex=False, length=TAIL_LINES, max_length=MAX_TAIL_LINES):
+        self._marker = re.compile(marker if regex else re.escape(marker))
+        self.length = int(length)
+        self.max_length = int(max_length)
+        self.found = set()
+        self._servers = {}
+
+    def poll(self, server_id, get_output):
+        """Fetch the console tail of `server_id` with `get_output(length)`
+        and return True once the marker has been seen."""
+        if server_id in self.found:
+            return True
+        state = self._servers.get(server_id)
+        length = self.max_length if state is None else state['length']
+        if state is None:
+            state = self._servers[server_id] = {'tail': [], 'length': self.length}
+        lines = (get_output(length) or '').split('\n')
+        # the last line may still be written to, it is scanned but not remembered
+        complete, partial = lines[:-1], lines[-1]
+        start = self._new_lines_start(complete, state['tail'])
+        if start is None:
+            start = 0
+            state['length'] = min(state['length'] * 2, self.max_length)
+        for line in complete[start:] + [partial]:
+            if self._marker.search(line):
+                self.found.add(server_id)
+                del self._servers[server_id]
+                return True
+        state['tail'] = complete[-OVERLAP_LINES:]
+        return False
+
+    def _new_lines_start(self, lines, tail):
+        if not tail:
+            return 0
+        # the earliest match is the safe one: rescanning a line is cheaper than skipping it
+        for end in range(len(tail), len(lines) + 1):
+            if lines[end - len(tail):end] == tail:
+                return end
+        return None
@@ -0,0 +1,97 @@
+import hashlib
+import mmap
+import os
+import threading
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# md5 of the image files already read, keyed on (path, size, mtime)
+_checksums = {}
+
+
+class ImageSource(object):
+    """A local image file shared by one or more concurrent uploads.
+
+    The file is memory mapped when possible so that concurrent uploads of
+    the same file read it from disk once. The md5 checksum is computed by
+    the first reader going through the whole file and cached for later
+    uploads of the same, unchanged, file.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = int(chunk_size)
+        self._file = open(path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self.size = stat.st_size
+        self._key = (os.path.realpath(path), stat.st_size, stat.st_mtime)
+        self._lock = threading.Lock()
+        self._hashing = False
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            # empty files and file systems without mmap support
+            self._mmap = None
+
+    @property
+    def checksum(self):
+        return _checksums.get(self._key)
+
+    def compute_checksum(self):
+        """Return the md5 checksum, reading the file if no upload has
+        gone through it, e.g. because the one computing it failed."""
+        checksum = self.checksum
+        if checksum is None:
+            md5 = hashlib.md5()
+            for offset in range(0, self.size, self.chunk_size):
+                md5.update(self.read_at(offset, self.chunk_size))
+            checksum = _checksums[self._key] = md5.hexdigest()
+        return checksum
+
+    def reader(self):
+        with self._lock:
+            hashing = self.checksum is None and not self._hashing
+            self._hashing = self._hashing or hashing
+        return _Reader(self, hashing)
+
+    def read_at(self, offset, size):
+        if self._mmap is not None:
+            return self._mmap[offset:offset + size]
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Reader(object):
+    """File-like view of an ImageSource with its own offset.
+
+    `read` returns chunks of the source's chunk size whatever the size
+    asked for, glanceclient only iterates over them.
+    """
+
+    def __init__(self, source, hashing):
+        self._source = source
+        self._offset = 0
+        self._md5 = hashlib.md5() if hashing else None
+
+    def read(self, size=-1):
+        data = self._source.read_at(self._offset, self._source.chunk_size)
+        self._offset += len(data)
+        if self._md5 is not None:
+            if data:
+                self._md5.update(data)
+            else:
+                _checksums[self._source._key] = self._md5.hexdigest()
+                self._md5 = None
+        return data
@@ -0,0 +1,61 @@
+INVENTORY_FIELDS = {
+    'networks': ('id', 'name', 'status'),
+    'subnets': ('id', 'name', 'network_id', 'cidr'),
+    'ports': ('id', 'name', 'network_id', 'device_id', 'status'),
+    'security_groups': ('id', 'name'),
+    'security_group_rules': ('id', 'security_group_id', 'direction', 'protocol'),
+    'servers': ('id', 'name', 'status'),
+    'stacks': ('id', 'stack_name', 'stack_status'),
+}
+
+
+class Inventory(object):
+    """Compact, indexed view of the resources of a project.
+
+    Only the fields listed in INVENTORY_FIELDS are kept for each resource,
+    as tuples, and resources can be looked up by id or by name.
+    """
+
+    def __init__(self):
+        self.limits = {}
+        self.counts = {}
+        self._fields = {}
+        self._by_id = {}
+        self._by_name = {}
+
+    def add(self, kind, fields, items):
+        """Add `items`, mappings or objects, of type `kind`."""
+        self._fields[kind] = fields
+        by_id = self._by_id.setdefault(kind, {})
+        by_name = self._by_name.setdefault(kind, {})
+        name_field = 'stack_name' if 'stack_name' in fields else 'name'
+        for item in items:
+            if isinstance(item, dict):
+                record = tuple(item.get(field) for field in fields)
+            else:
+                record = tuple(getattr(item, field, None) for field in fields)
+            resource_id = record[fields.index('id')]
+            by_id[resource_id] = record
+            if name_field in fields:
+                by_name.setdefault(record[fields.index(name_field)], []).append(resource_id)
+        self.counts[kind] = len(by_id)
+
+    def get(self, kind, resource_id):
+        """Return the resource of type `kind` with id `resource_id` as a dictionary, or None."""
+        record = self._by_id.get(kind, {}).get(resource_id)
+        if record is None:
+            return None
+        return dict(zip(self._fields[kind], record))
+
+    def find(self, kind, name):
+        """Return the resources of type `kind` named `name` as a list of dictionaries."""
+        return [self.get(kind, resource_id) for resource_id in self._by_name.get(kind, {}).get(name, [])]
+
+    def ids(self, kind):
+        return list(self._by_id.get(kind, {}))
+
+    def count(self, kind):
+        return self.counts.get(kind, 0)
+
+    def __repr__(self):
+        return 'Inventory(%s)' % ', '.join('%s=%s' % (kind, count) for kind, count in sorted(self.counts.items()))
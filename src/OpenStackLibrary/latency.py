@@ -0,0 +1,214 @@
+import csv
+import json
+import math
+import re
+import threading
+import time
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+REPORT_FIELDS = ('keyword', 'alias', 'service', 'method', 'url', 'status')
+# time.clock on Python 2
+_process_time = getattr(time, 'process_time', None) or time.clock
+_ID_SEGMENT = re.compile(r'^([0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}|\d+)$')
+
+
+# collections whose members are addressed by name, e.g. /os-keypairs/key-1 or /stacks/stack-1/<id>
+_NAMED_COLLECTIONS = ('os-keypairs', 'stacks')
+
+
+def url_template(url):
+    """Return the path of `url` with ids replaced by `{id}` and names by `{name}`."""
+    segments = urlparse(url).path.split('/')
+    template = []
+    for i, segment in enumerate(segments):
+        if _ID_SEGMENT.match(segment):
+            template.append('{id}')
+        elif i > 0 and segments[i - 1] in _NAMED_COLLECTIONS and segment:
+            template.append('{name}')
+        else:
+            template.append(segment)
+    return '/'.join(template)
+
+
+# latencies are counted in buckets growing by 5% from 0.1 ms, percentiles are within 2.5%
+_BUCKET_BASE = 0.1
+_BUCKET_GROWTH = 1.05
+
+
+class Histogram(object):
+    """Latency histogram in milliseconds with a fixed relative precision.
+
+    Memory depends on the spread of the latencies, not on their count:
+    a few hundred buckets cover 0.1 ms to minutes.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, value):
+        bucket = int(math.log(value / _BUCKET_BASE, _BUCKET_GROWTH)) + 1 if value > _BUCKET_BASE else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Nearest-rank percentile, the geometric middle of its bucket."""
+        if not self.count:
+            return None
+        rank = max(1, min(int(round(pct / 100.0 * self.count + 0.5)), self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(_BUCKET_BASE * _BUCKET_GROWTH ** (bucket - 0.5), self.max)
+        return self.max
+
+
+class LatencyRecorder(object):
+    """Records the latency of every HTTP request sent through the
+    keystoneauth sessions it instruments.
+
+    Samples are attributed to the library keyword running at the time,
+    as tracked by KeywordListener, which also reports the wall clock and
+    CPU time spent in the keywords. They are aggregated as they arrive
+    into one histogram per (keyword, alias, service, method, url, status).
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._keywords = []
+        self._keyword_times = {}
+
+    def instrument(self, session, alias):
+        request = session.request
+
+        def timed_request(url, method, *args, **kwargs):
+            endpoint_filter = kwargs.get('endpoint_filter') or {}
+            service = endpoint_filter.get('service_type') or kwargs.get('microversion_service_type')
+            if service is None:
+                service = 'identity' if '/auth/tokens' in url else urlparse(url).netloc
+            start_timestamp = time.time()
+            status = 'error'
+            try:
+                resp = request(url, method, *args, **kwargs)
+                status = resp.status_code
+                return resp
+            except Exception as ex:
+                status = getattr(ex, 'http_status', None) or 'error'
+                raise
+            finally:
+                self.record(alias, service, method, url, status, time.time() - start_timestamp)
+
+        session.request = timed_request
+        return session
+
+    def record(self, alias, service, method, url, status, latency):
+        keyword = self._keywords[-1][0] if self._keywords else None
+        key = (keyword, alias, service, method, url_template(url), status)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.add(latency * 1000.0)
+
+    def start_keyword(self, name):
+        self._keywords.append((name, time.time(), _process_time()))
+
+    def end_keyword(self, name, timed=True):
+        if not self._keywords:
+            return
+        name, wall, cpu = self._keywords.pop()
+        if timed:
+            calls, total_wall, total_cpu = self._keyword_times.get(name, (0, 0.0, 0.0))
+            self._keyword_times[name] = (calls + 1, total_wall + time.time() - wall, total_cpu + _process_time() - cpu)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._keyword_times = {}
+
+    def keyword_report(self):
+        """Return the calls, API requests, wall clock and CPU seconds of
+        every timed keyword."""
+        requests = {}
+        with self._lock:
+            for key, histogram in self._histograms.items():
+                requests[key[0]] = requests.get(key[0], 0) + histogram.count
+        return [{'keyword': name, 'calls': calls, 'requests': requests.get(name, 0), 'wall': wall, 'cpu': cpu}
+                for name, (calls, wall, cpu) in sorted(self._keyword_times.items())]
+
+    def report(self, group_by=('keyword', 'alias')):
+        """Aggregate the histograms into rows of count, errors and latency
+        percentiles in milliseconds, grouped by the `group_by` fields."""
+        indexes = [REPORT_FIELDS.index(field) for field in group_by]
+        groups = {}
+        errors = {}
+        with self._lock:
+            for key, histogram in self._histograms.items():
+                group = tuple(key[i] for i in indexes)
+                groups.setdefault(group, Histogram()).merge(histogram)
+                status = key[5]
+                if status == 'error' or (isinstance(status, int) and status >= 400):
+                    errors[group] = errors.get(group, 0) + histogram.count
+        rows = []
+        for key in sorted(groups, key=lambda k: tuple(str(v) for v in k)):
+            histogram = groups[key]
+            row = dict(zip(group_by, key))
+            row.update({
+                'count': histogram.count,
+                'errors': errors.get(key, 0),
+                'mean': histogram.total / histogram.count,
+                'p50': histogram.percentile(50),
+                'p95': histogram.percentile(95),
+                'p99': histogram.percentile(99),
+                'max': histogram.max,
+            })
+            rows.append(row)
+        return rows
+
+    def write(self, path, group_by=('keyword', 'alias'), format=None):
+        rows = self.report(group_by)
+        if format is None:
+            format = 'csv' if path.endswith('.csv') else 'json'
+        with open(path, 'w') as f:
+            if format == 'csv':
+                writer = csv.DictWriter(f, fieldnames=list(group_by) + ['count', 'errors', 'mean', 'p50', 'p95', 'p99', 'max'])
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump(rows, f, indent=2)
+        return path
+
+
+class KeywordListener(object):
+    """Robot Framework library listener telling a LatencyRecorder which
+    keyword is running. Only the keywords of `library` are timed."""
+
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, recorder, library):
+        self.recorder = recorder
+        self.library = library
+
+    def start_keyword(self, name, attrs):
+        self.recorder.start_keyword(attrs.get('kwname', name))
+
+    def end_keyword(self, name, attrs):
+        kwname = attrs.get('kwname', name)
+        self.recorder.end_keyword(kwname, hasattr(self.library, kwname.lower().replace(' ', '_')))
@@ -0,0 +1,18 @@
+import importlib
+
+
+class LazyModule(object):
+    """Stand-in for a module that is only imported on first attribute access.
+
+    The OpenStack client packages take seconds to import, so they are only
+    loaded when a keyword needs them.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
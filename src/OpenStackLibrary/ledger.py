@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# resources are deleted tier by tier, the kinds of a tier do not depend on each other;
+# reservations of servers are resolved to the servers before the first tier.
+# Users and projects come last: the other resources may have been created
+# through a session of a recorded user or in a recorded project.
+CLEANUP_TIERS = (
+    ('servers', 'stacks'),
+    ('ports', 'images', 'keypairs', 'flavors'),
+    ('subnets',),
+    ('networks',),
+    ('users',),
+    ('projects',),
+)
+
+
+class Ledger(object):
+    """Record of the resources created through the library.
+
+    Entries are keyed on (alias, kind, id) and carry the resource name.
+    With a `path`, every change is appended to that file as one JSON line
+    per resource, ["+", alias, kind, id, name] or ["-", alias, kind, id],
+    so a ledger loaded from the file of a run that crashed holds what that
+    run left behind. Lines are written, not synced: a crash of the test run
+    loses nothing, a crash of the host may lose the last ones. The file is
+    rewritten with the live entries only when it is loaded and when the
+    ledger is compacted.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # a line cut short by a crash
+                        continue
+                    if record[0] == '+':
+                        self._entries[tuple(record[1:4])] = record[4]
+                    else:
+                        self._entries.pop(tuple(record[1:4]), None)
+        self.compact()
+
+    def add(self, alias, kind, resources):
+        """Record `resources`, (id, name) pairs, created through `alias`."""
+        records = [('+', alias, kind, resource_id, name) for resource_id, name in resources if resource_id is not None]
+        with self._lock:
+            for record in records:
+                self._entries[record[1:4]] = record[4]
+            self._append(records)
+
+    def remove(self, alias, kind, resource_ids):
+        with self._lock:
+            records = [('-', alias, kind, resource_id) for resource_id in resource_ids
+                       if self._entries.pop((alias, kind, resource_id), 0) != 0]
+            self._append(records)
+
+    def entries(self, kinds=None, aliases=None):
+        """Return {(alias, kind): {id: name}} for the recorded resources."""
+        rt = OrderedDict()
+        with self._lock:
+            for (alias, kind, resource_id), name in self._entries.items():
+                if (kinds is None or kind in kinds) and (aliases is None or alias in aliases):
+                    rt.setdefault((alias, kind), OrderedDict())[resource_id] = name
+        return rt
+
+    def counts(self):
+        rt = {}
+        with self._lock:
+            for alias, kind, resource_id in self._entries:
+                rt[kind] = rt.get(kind, 0) + 1
+        return rt
+
+    def compact(self):
+        if self.path is None:
+            return
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            # write and rename so that a crash never leaves a partial ledger
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'w') as f:
+                for (alias, kind, resource_id), name in self._entries.items():
+                    f.write(json.dumps(['+', alias, kind, resource_id, name]) + '\n')
+            os.rename(tmp_path, self.path)
+
+    def _append(self, records):
+        if self.path is None or not records:
+            return
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(list(record)) + '\n' for record in records))
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,100 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROFILES = ('constant', 'ramp', 'step', 'burst')
+
+
+def schedule(profile, duration, rate, end_rate=None, steps=4, burst_size=10):
+    """Return the offsets in seconds at which operations start.
+
+    `constant` runs `rate` operations per second, `ramp` goes linearly from
+    `rate` to `end_rate`, `step` goes from `rate` to `end_rate` in `steps`
+    equal steps and `burst` starts `burst_size` operations at once `rate`
+    times per second. The schedule only depends on its arguments.
+    """
+    duration = float(duration)
+    rate = float(rate)
+    end_rate = rate if end_rate is None else float(end_rate)
+    if profile == 'constant':
+        return [i / rate for i in range(int(duration * rate))]
+    if profile == 'ramp':
+        # invert N(t) = rate * t + (end_rate - rate) * t^2 / (2 * duration)
+        slope = (end_rate - rate) / duration
+        total = int(rate * duration + slope * duration * duration / 2)
+        if slope == 0:
+            return [i / rate for i in range(total)]
+        return [(-rate + math.sqrt(rate * rate + 2 * slope * i)) / slope for i in range(total)]
+    if profile == 'step':
+        steps = int(steps)
+        step_duration = duration / steps
+        offsets = []
+        for step in range(steps):
+            step_rate = rate + (end_rate - rate) * step / max(steps - 1, 1)
+            offsets.extend(step * step_duration + i / step_rate for i in range(int(step_duration * step_rate)))
+        return offsets
+    if profile == 'burst':
+        return [i / rate for i in range(int(duration * rate)) for _ in range(int(burst_size))]
+    raise ValueError('Unknown load profile %s, expected one of %s' % (profile, ', '.join(PROFILES)))
+
+
+def run_schedule(func, offsets, concurrency):
+    """Call `func(index)` at each offset, open loop, with at most
+    `concurrency` calls running at once.
+
+    Returns one (scheduled, started, finished, error) sample per call,
+    times relative to the start of the run.
+    """
+    samples = [None] * len(offsets)
+    start_timestamp = time.time()
+
+    def call(index):
+        started = time.time() - start_timestamp
+        error = None
+        try:
+            func(index)
+        except Exception as ex:
+            error = ex
+        samples[index] = (offsets[index], started, time.time() - start_timestamp, error)
+
+    with ThreadPoolExecutor(max_workers=int(concurrency)) as executor:
+        for index, offset in enumerate(offsets):
+            delay = start_timestamp + offset - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(call, index)
+    return samples
+
+
+def summarize(samples, window=1.0):
+    """Aggregate samples into the achieved throughput, queue delay and
+    error rate of the whole run and of every `window` seconds."""
+    window = float(window)
+    timeline = {}
+    for scheduled, started, finished, error in samples:
+        bucket = timeline.setdefault(int(started // window), {'started': 0, 'errors': 0, 'queue_delay': 0.0, 'latency': 0.0})
+        bucket['started'] += 1
+        bucket['errors'] += error is not None
+        bucket['queue_delay'] += started - scheduled
+        bucket['latency'] += finished - started
+    rows = []
+    for index in sorted(timeline):
+        bucket = timeline[index]
+        rows.append({
+            'time': index * window,
+            'throughput': bucket['started'] / window,
+            'error_rate': float(bucket['errors']) / bucket['started'],
+            'queue_delay': bucket['queue_delay'] / bucket['started'],
+            'latency': bucket['latency'] / bucket['started'],
+        })
+    elapsed = max([finished for _, _, finished, _ in samples] or [0])
+    errors = [error for _, _, _, error in samples if error is not None]
+    return {
+        'operations': len(samples),
+        'errors': len(errors),
+        'elapsed': elapsed,
+        'throughput': len(samples) / elapsed if elapsed else 0,
+        'error_rate': float(len(errors)) / len(samples) if samples else 0,
+        'max_queue_delay': max([started - scheduled for scheduled, started, _, _ in samples] or [0]),
+        'timeline': rows,
+    }
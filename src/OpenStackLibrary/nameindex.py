@@ -0,0 +1,50 @@
+import threading
+import time
+
+
+class NameIndex(object):
+    """Per-session name to object index for keystone lookups.
+
+    Entries are keyed on (alias, kind, scope, name) and expire after `ttl`
+    seconds. A `ttl` of 0 disables the index.
+    """
+
+    def __init__(self, ttl=0):
+        self.ttl = float(ttl)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, alias, kind, scope, name):
+        if not self.ttl:
+            return None
+        key = (alias, kind, scope, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            obj, timestamp = entry
+            if time.time() - timestamp > self.ttl:
+                del self._entries[key]
+                return None
+            return obj
+
+    def put(self, alias, kind, scope, obj):
+        if not self.ttl or obj is None:
+            return
+        with self._lock:
+            self._entries[(alias, kind, scope, obj.name)] = (obj, time.time())
+
+    def remove(self, alias, kind, id_or_name):
+        with self._lock:
+            for key, (obj, timestamp) in list(self._entries.items()):
+                if key[:2] == (alias, kind) and id_or_name in (getattr(obj, 'id', None), obj.name):
+                    del self._entries[key]
+
+    def invalidate(self, alias):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == alias]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONCURRENCY = 10
+
+
+def run_parallel(func, items, concurrency=DEFAULT_CONCURRENCY):
+    """Call `func` on every item using at most `concurrency` threads.
+
+    Returns `(results, errors)`: `results` is in the order of `items` with
+    None for failed items, `errors` is a list of (index, item, exception).
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = []
+    if not items:
+        return results, errors
+    workers = max(1, min(int(concurrency), len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(func, item) for item in items]
+        for index, future in enumerate(futures):
+            try:
+                results[index] = future.result()
+            except Exception as ex:
+                errors.append((index, items[index], ex))
+    return results, errors
+
+
+def chunks(items, size):
+    size = max(1, int(size))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def expand_names(name_template, count):
+    """Expand `name_template` into `count` names, numbered from 1.
+
+    `{index}` in the template is replaced by the number, otherwise
+    `-<number>` is appended as done by Create Stacks.
+    """
+    names = []
+    for i in range(1, int(count) + 1):
+        if '{index}' in name_template:
+            names.append(name_template.replace('{index}', str(i)))
+        else:
+            names.append(name_template + '-' + str(i))
+    return names
@@ -0,0 +1,29 @@
+import time
+
+POLL_INTERVAL_MIN = 1
+POLL_INTERVAL_MAX = 10
+
+
+class Backoff(object):
+    """Adaptive poll interval.
+
+    The interval grows by `factor` on every wait without progress, up to
+    `maximum`, and drops back to `initial` when `reset` is called.
+    """
+
+    def __init__(self, initial=POLL_INTERVAL_MIN, maximum=POLL_INTERVAL_MAX, factor=1.5):
+        self.initial = float(initial)
+        self.maximum = float(maximum)
+        self.factor = factor
+        self.interval = self.initial
+
+    def reset(self):
+        self.interval = self.initial
+
+    def wait(self, deadline=None):
+        delay = self.interval
+        if deadline is not None:
+            delay = min(delay, deadline - time.time())
+        if delay > 0:
+            time.sleep(delay)
+        self.interval = min(self.interval * self.factor, self.maximum)
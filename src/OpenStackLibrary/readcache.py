@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReadCache(object):
+    """Least recently used cache of API responses with a time to live.
+
+    Entries are keyed on (alias, key) and carry a tag naming the kind of
+    resource they hold, e.g. 'ports', so that mutating keywords can drop
+    every entry of that kind. A `ttl` of 0, the default, disables caching.
+    The dicts and lists of the cached responses are copied on the way in
+    and out, so callers editing a response do not change later hits.
+    """
+
+    def __init__(self, ttl=0, max_size=256):
+        self.ttl = float(ttl)
+        self.max_size = int(max_size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def get(self, alias, tag, key, fetch, bypass=False):
+        """Return the cached value for (alias, key), calling `fetch` on a miss."""
+        if not self.ttl:
+            return fetch()
+        cache_key = (alias, key)
+        with self._lock:
+            stats = self._stats.setdefault(alias, {'hits': 0, 'misses': 0})
+            entry = self._entries.get(cache_key)
+            if entry is not None and not bypass and time.time() - entry[2] <= self.ttl:
+                self._entries[cache_key] = self._entries.pop(cache_key)
+                stats['hits'] += 1
+                return _copy(entry[1])
+            stats['misses'] += 1
+        value = fetch()
+        with self._lock:
+            self._entries.pop(cache_key, None)
+            self._entries[cache_key] = (tag, _copy(value), time.time())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *tags):
+        """Drop the entries of every alias tagged with one of `tags`."""
+        with self._lock:
+            for cache_key in [k for k, entry in self._entries.items() if entry[0] in tags]:
+                del self._entries[cache_key]
+
+    def flush(self, alias=None):
+        with self._lock:
+            for cache_key in [k for k in self._entries if alias is None or k[0] == alias]:
+                del self._entries[cache_key]
+
+    def statistics(self):
+        with self._lock:
+            stats = {}
+            for alias, counts in self._stats.items():
+                total = counts['hits'] + counts['misses']
+                stats[alias] = dict(counts, hit_rate=float(counts['hits']) / total if total else 0.0,
+                                    size=len([k for k in self._entries if k[0] == alias]))
+            return stats
+
+    def reset_statistics(self):
+        with self._lock:
+            self._stats = {}
+
+
+def _copy(value):
+    # client resource objects hold their manager and are shared, not copied
+    if isinstance(value, dict):
+        return dict((key, _copy(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    return value
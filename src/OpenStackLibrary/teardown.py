@@ -0,0 +1,50 @@
+import time
+
+try:
+    from .parallel import DEFAULT_CONCURRENCY, run_parallel
+    from .polling import Backoff
+except ImportError:
+    from parallel import DEFAULT_CONCURRENCY, run_parallel
+    from polling import Backoff
+
+
+def delete_and_wait(resources, delete, list_remaining, timeout, not_found=(), concurrency=DEFAULT_CONCURRENCY):
+    """Delete `resources` and wait until they are gone.
+
+    `resources` maps resource id to name. `delete(id)` is called once per
+    resource, concurrently; an exception in `not_found` means the resource
+    is already gone, any other one that the delete was rejected and the
+    resource is not waited for. Completion is then watched with one
+    `list_remaining()` call per poll, which returns the ids still present.
+
+    Returns `(latencies, leftovers, errors)`: seconds from the delete
+    request until the resource disappeared, the resources still present
+    at the timeout, and (id, exception) for the rejected delete requests.
+    """
+    pending = dict(resources)
+    latencies = {}
+    errors = []
+    start_timestamp = time.time()
+    deadline = start_timestamp + int(timeout)
+    ids = list(pending)
+    sent, failed = run_parallel(delete, ids, concurrency)
+    for index, resource_id, ex in failed:
+        if isinstance(ex, not_found):
+            latencies[resource_id] = time.time() - start_timestamp
+            del pending[resource_id]
+        else:
+            errors.append((resource_id, ex))
+            del pending[resource_id]
+    backoff = Backoff()
+    while pending:
+        remaining = set(list_remaining())
+        gone = [resource_id for resource_id in pending if resource_id not in remaining]
+        for resource_id in gone:
+            latencies[resource_id] = time.time() - start_timestamp
+            del pending[resource_id]
+        if not pending or time.time() >= deadline:
+            break
+        if gone:
+            backoff.reset()
+        backoff.wait(deadline)
+    return latencies, pending, errors
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+
+class TokenCache(object):
+    """Shares keystoneauth plugins between sessions with the same
+    credentials and optionally persists their scoped tokens on disk.
+
+    The files written in the cache directory hold the plugin auth state
+    (token and catalog) and are only readable by their owner. They are
+    named after a key that must not be derived from secrets, since the
+    directory listing may be readable by others.
+    """
+
+    def __init__(self):
+        self._plugins = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*credentials):
+        return hashlib.sha256('\0'.join(str(c) for c in credentials).encode('utf-8')).hexdigest()
+
+    def plugin(self, key, factory):
+        with self._lock:
+            auth = self._plugins.get(key)
+            if auth is None:
+                auth = factory()
+                self._plugins[key] = auth
+            return auth
+
+    def load(self, auth, key, directory, refresh_before):
+        """Load the token cached in `directory` into `auth`, unless it
+        expires within `refresh_before` seconds. Returns True if loaded."""
+        path = os.path.join(directory, key)
+        try:
+            with open(path) as f:
+                auth.set_auth_state(f.read())
+        except (EnvironmentError, ValueError, KeyError):
+            return False
+        if auth.auth_ref is None or auth.auth_ref.will_expire_soon(int(refresh_before)):
+            auth.invalidate()
+            return False
+        return True
+
+    def save(self, auth, key, directory):
+        state = auth.get_auth_state()
+        if state is None:
+            return
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        # write and rename so that parallel processes never read a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'w') as f:
+            f.write(state)
+        os.rename(tmp_path, os.path.join(directory, key))
+
+    def clear(self):
+        with self._lock:
+            self._plugins.clear()
@@ -0,0 +1,561 @@
+"""Local stand-in for the keystone, nova, neutron, heat and glance APIs
+used by OpenStackKeywords, for offline benchmarks of the library.
+
+Run as a script it serves the fake APIs; imported by Robot Framework it is
+a library starting and stopping that script in a separate process, so the
+CPU time of the Robot process is the library's own.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlencode, urlparse
+    from urllib.request import Request, urlopen
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import urlencode
+    from urlparse import parse_qs, urlparse
+    from urllib2 import Request, urlopen
+
+PROJECT_ID = 'f0e1d2c3b4a5968778695a4b3c2d1e0f'
+USER_ID = '0a1b2c3d4e5f60718293a4b5c6d7e8f9'
+DOMAIN = {'id': 'default', 'name': 'Default'}
+IMAGE_SCHEMA = {
+    'name': 'image',
+    'properties': {
+        'id': {'type': 'string'},
+        'name': {'type': ['null', 'string']},
+        'status': {'type': 'string'},
+        'disk_format': {'type': ['null', 'string']},
+        'container_format': {'type': ['null', 'string']},
+        'checksum': {'type': ['null', 'string']},
+        'size': {'type': ['null', 'integer']},
+    },
+    'additionalProperties': True,
+}
+NEUTRON_COLLECTIONS = {
+    'networks': 'network',
+    'subnets': 'subnet',
+    'ports': 'port',
+    'security-groups': 'security_group',
+    'security-group-rules': 'security_group_rule',
+}
+
+
+class FakeCloud(object):
+    """State of the fake cloud. Transitions are computed from timestamps
+    when resources are read, so they cost nothing while nobody looks."""
+
+    def __init__(self, build_time=2, boot_time=1, delete_time=1, stack_time=2, console_marker='login:',
+                 fail_pattern=None):
+        self.build_time = build_time
+        self.boot_time = boot_time
+        self.delete_time = delete_time
+        self.stack_time = stack_time
+        self.console_marker = console_marker
+        self.fail_pattern = re.compile(fail_pattern) if fail_pattern else None
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.servers = {}
+        self.stacks = {}
+        self.images = {}
+        self.flavors = {}
+        self.keypairs = {}
+        self.projects = {}
+        self.users = {}
+        # token to user name, the tokens of deleted users are refused like keystone revokes them
+        self.tokens = {}
+        self.deleted_users = set()
+        self.roles = dict((role_id, {'id': role_id, 'name': name})
+                          for role_id, name in ((uuid.uuid4().hex, 'admin'), (uuid.uuid4().hex, '_member_'),
+                                                (uuid.uuid4().hex, 'swiftoperator')))
+        self.neutron = dict((collection, {}) for collection in NEUTRON_COLLECTIONS)
+
+    def fails(self, name):
+        return self.fail_pattern is not None and self.fail_pattern.search(name or '') is not None
+
+    def count(self, method, template):
+        key = '%s %s' % (method, template)
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return {'total': sum(self.requests.values()), 'requests': dict(self.requests)}
+
+    def reset(self):
+        with self.lock:
+            self.requests = {}
+
+    # nova
+
+    def server_view(self, server, now):
+        age = now - server['created']
+        if server['deleted'] is not None and now - server['deleted'] >= self.delete_time:
+            return None
+        if self.fails(server['name']):
+            status = 'ERROR' if age >= self.build_time else 'BUILD'
+        else:
+            status = 'ACTIVE' if age >= self.build_time else 'BUILD'
+        return {
+            'id': server['id'],
+            'name': server['name'],
+            'status': status,
+            'tenant_id': PROJECT_ID,
+            'OS-EXT-STS:vm_state': status.lower(),
+            'OS-EXT-STS:task_state': 'deleting' if server['deleted'] is not None else None,
+            'OS-EXT-SRV-ATTR:reservation_id': server['reservation_id'],
+            'flavor': {'id': server['flavor']},
+            'image': {'id': server['image']},
+            'addresses': {},
+            'metadata': {},
+            'links': [],
+        }
+
+    def console_output(self, server, length, now):
+        uptime = now - server['created'] - self.build_time
+        lines = ['[%8.3f] boot message %d' % (i / 10.0, i) for i in range(max(0, int(uptime * 10)))]
+        if uptime >= self.boot_time:
+            lines.append(self.console_marker)
+        if length:
+            lines = lines[-int(length):]
+        return '\n'.join(lines)
+
+    # heat
+
+    def stack_view(self, stack, now):
+        if stack['deleted'] is not None:
+            if now - stack['deleted'] >= self.delete_time:
+                return None
+            status = 'DELETE_IN_PROGRESS'
+        elif now - stack['created'] < self.stack_time:
+            status = 'CREATE_IN_PROGRESS'
+        else:
+            status = 'CREATE_FAILED' if self.fails(stack['stack_name']) else 'CREATE_COMPLETE'
+        return {
+            'id': stack['id'],
+            'stack_name': stack['stack_name'],
+            'stack_status': status,
+            'stack_status_reason': 'Injected failure' if status == 'CREATE_FAILED' else 'Stack %s' % status,
+            'creation_time': stack['creation_time'],
+            'links': [],
+        }
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    cloud = None
+    latency = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_PATCH(self):
+        self.dispatch('PATCH')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def reply(self, status, body=None, headers=None):
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        if data:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def dispatch(self, method):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        raw = self.read_body()
+        path = url.path.rstrip('/')
+        if not path.startswith('/_fake'):
+            if self.latency:
+                time.sleep(self.latency)
+            self.cloud.count(method, re.sub(r'/[0-9a-f]{32}|/[0-9a-f-]{36}', '/{id}', path))
+            if self.cloud.tokens.get(self.headers.get('X-Auth-Token')) in self.cloud.deleted_users:
+                return self.reply(401, {'error': {'code': 401, 'message': 'The token has been revoked'}})
+        for prefix, handler in (('/_fake', self.fake), ('/identity/v3', self.keystone),
+                                ('/compute/v2.1', self.nova), ('/network/v2.0', self.neutron),
+                                ('/heat/v1/' + PROJECT_ID, self.heat), ('/image/v2', self.glance)):
+            if path == prefix or path.startswith(prefix + '/'):
+                try:
+                    body = json.loads(raw.decode('utf-8')) if raw and 'json' in self.headers.get('Content-Type', '') else raw
+                    return handler(method, path[len(prefix):], query, body)
+                except Exception as ex:
+                    return self.reply(500, {'error': {'message': str(ex)}})
+        self.reply(404, {'error': {'message': 'No route for %s %s' % (method, path)}})
+
+    def fake(self, method, path, query, body):
+        if path == '/stats':
+            return self.reply(200, self.cloud.stats())
+        if path == '/reset':
+            self.cloud.reset()
+            return self.reply(204)
+        self.reply(404)
+
+    def keystone(self, method, path, query, body):
+        cloud = self.cloud
+        host = 'http://%s:%s' % self.server.server_address[:2]
+        if path == '/auth/tokens' and method == 'POST':
+            expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+            catalog = [{'type': service_type, 'name': name, 'id': uuid.uuid4().hex,
+                        'endpoints': [{'id': uuid.uuid4().hex, 'interface': interface, 'region': 'RegionOne',
+                                       'region_id': 'RegionOne', 'url': host + endpoint}
+                                      for interface in ('public', 'internal', 'admin')]}
+                       for service_type, name, endpoint in (('identity', 'keystone', '/identity/v3'),
+                                                            ('compute', 'nova', '/compute/v2.1'),
+                                                            ('network', 'neutron', '/network'),
+                                                            ('orchestration', 'heat', '/heat/v1/' + PROJECT_ID),
+                                                            ('image', 'glance', '/image'))]
+            token = {'token': {
+                'methods': ['password'],
+                'expires_at': expires.strftime('%Y-%m-%dT%H:%M:%S.000000Z'),
+                'issued_at': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.000000Z'),
+                'user': {'id': USER_ID, 'name': 'admin', 'domain': DOMAIN},
+                'project': {'id': PROJECT_ID, 'name': 'admin', 'domain': DOMAIN},
+                'roles': [{'id': role_id, 'name': role['name']} for role_id, role in cloud.roles.items()],
+                'catalog': catalog,
+            }}
+            identity = body['auth']['identity']
+            if 'password' in identity:
+                user_name = identity['password']['user'].get('name')
+            else:
+                user_name = cloud.tokens.get(identity['token']['id'])
+            if user_name in cloud.deleted_users:
+                return self.reply(401, {'error': {'code': 401, 'message': 'The user has been deleted'}})
+            token_id = uuid.uuid4().hex
+            cloud.tokens[token_id] = user_name
+            return self.reply(201, token, {'X-Subject-Token': token_id})
+        match = re.match(r'^/(projects|users|roles)(?:/([^/]+))?$', path)
+        if match:
+            collection, resource_id = match.groups()
+            store = getattr(cloud, collection)
+            singular = collection[:-1]
+            if method == 'GET' and resource_id is None:
+                items = [item for item in store.values() if 'name' not in query or item['name'] == query['name'][0]]
+                return self.reply(200, {collection: items, 'links': {}})
+            if method == 'GET':
+                item = store.get(resource_id)
+                return self.reply(200, {singular: item}) if item is not None else self.reply(404)
+            if method == 'POST':
+                item = dict(body[singular], id=uuid.uuid4().hex, links={})
+                item.pop('password', None)
+                store[item['id']] = item
+                return self.reply(201, {singular: item})
+            if method == 'DELETE':
+                item = store.pop(resource_id, None)
+                if item is not None and collection == 'users':
+                    cloud.deleted_users.add(item['name'])
+                return self.reply(204 if item is not None else 404)
+        if re.match(r'^/projects/[^/]+/users/[^/]+/roles/[^/]+$', path) and method == 'PUT':
+            return self.reply(204)
+        self.reply(404)
+
+    def nova(self, method, path, query, body):
+        cloud = self.cloud
+        now = time.time()
+        if path in ('/servers', '/servers/detail') and method == 'GET':
+            with cloud.lock:
+                servers = [cloud.server_view(server, now) for server in cloud.servers.values()]
+            name = query.get('name', [None])[0]
+            reservation_id = query.get('reservation_id', [None])[0]
+            servers = [server for server in servers if server is not None and (name is None or re.search(name, server['name']))
+                       and reservation_id in (None, server['OS-EXT-SRV-ATTR:reservation_id'])]
+            if 'marker' in query:
+                ids = [server['id'] for server in servers]
+                servers = servers[ids.index(query['marker'][0]) + 1:] if query['marker'][0] in ids else []
+            if 'limit' in query:
+                servers = servers[:int(query['limit'][0])]
+            return self.reply(200, {'servers': servers})
+        if path == '/servers' and method == 'POST':
+            request = body['server']
+            count = int(request.get('max_count', 1))
+            reservation_id = 'r-' + uuid.uuid4().hex[:8]
+            created = []
+            with cloud.lock:
+                for i in range(1, count + 1):
+                    name = request['name'] if count == 1 else '%s-%d' % (request['name'], i)
+                    server = {'id': str(uuid.uuid4()), 'name': name, 'created': now, 'deleted': None,
+                              'flavor': request.get('flavorRef'), 'image': request.get('imageRef'),
+                              'reservation_id': reservation_id}
+                    cloud.servers[server['id']] = server
+                    created.append(server)
+            if request.get('return_reservation_id'):
+                return self.reply(202, {'reservation_id': reservation_id})
+            return self.reply(202, {'server': {'id': created[0]['id'], 'links': [], 'adminPass': 'secret'}})
+        match = re.match(r'^/servers/([^/]+)(/action)?$', path)
+        if match:
+            server_id, action = match.groups()
+            with cloud.lock:
+                server = cloud.servers.get(server_id)
+                view = cloud.server_view(server, now) if server is not None else None
+                if server is not None and view is None:
+                    del cloud.servers[server_id]
+            if view is None:
+                return self.reply(404, {'itemNotFound': {'code': 404, 'message': 'Server not found'}})
+            if method == 'GET':
+                return self.reply(200, {'server': view})
+            if method == 'DELETE':
+                if server['deleted'] is None:
+                    server['deleted'] = now
+                return self.reply(204)
+            if action and 'os-getConsoleOutput' in body:
+                length = body['os-getConsoleOutput'].get('length')
+                return self.reply(200, {'output': cloud.console_output(server, length, now)})
+        if path == '/flavors' and method == 'POST':
+            flavor = dict(body['flavor'])
+            flavor.setdefault('id', str(uuid.uuid4()))
+            flavor.update({'links': [], 'OS-FLV-EXT-DATA:ephemeral': 0, 'os-flavor-access:is_public': True})
+            cloud.flavors[flavor['id']] = flavor
+            return self.reply(200, {'flavor': flavor})
+        match = re.match(r'^/flavors/([^/]+)$', path)
+        if match and method == 'DELETE':
+            return self.reply(202 if cloud.flavors.pop(match.group(1), None) is not None else 404)
+        if path == '/os-keypairs' and method == 'POST':
+            keypair = dict(body['keypair'], fingerprint=hashlib.md5(body['keypair']['name'].encode('utf-8')).hexdigest(),
+                           user_id=USER_ID)
+            cloud.keypairs[keypair['name']] = keypair
+            return self.reply(200, {'keypair': keypair})
+        match = re.match(r'^/os-keypairs/([^/]+)$', path)
+        if match and method == 'DELETE':
+            return self.reply(202 if cloud.keypairs.pop(match.group(1), None) is not None else 404)
+        if path == '/limits' and method == 'GET':
+            with cloud.lock:
+                instances = len(cloud.servers)
+            return self.reply(200, {'limits': {'rate': [], 'absolute': {
+                'maxTotalInstances': 100, 'maxTotalCores': 100, 'maxTotalRAMSize': 204800,
+                'totalInstancesUsed': instances, 'totalCoresUsed': instances, 'totalRAMUsed': instances * 2048}}})
+        if path == '/os-hypervisors/statistics' and method == 'GET':
+            return self.reply(200, {'hypervisor_statistics': {
+                'count': 1, 'vcpus': 64, 'vcpus_used': len(cloud.servers), 'memory_mb': 262144,
+                'memory_mb_used': len(cloud.servers) * 2048, 'running_vms': len(cloud.servers)}})
+        match = re.match(r'^/os-quota-sets/([^/]+)$', path)
+        if match and method == 'PUT':
+            return self.reply(200, {'quota_set': body['quota_set']})
+        self.reply(404, {'itemNotFound': {'code': 404, 'message': 'Not found'}})
+
+    def neutron(self, method, path, query, body):
+        match = re.match(r'^/(networks|subnets|ports|security-groups|security-group-rules)(?:/([^/]+))?$', path)
+        if match:
+            collection, resource_id = match.groups()
+            singular = NEUTRON_COLLECTIONS[collection]
+            plural = singular + 's'
+            store = self.cloud.neutron[collection]
+            if method == 'GET' and resource_id is None:
+                fields = query.get('fields')
+                filters = dict((key, values) for key, values in query.items()
+                               if key not in ('project_id', 'fields', 'limit', 'marker'))
+                with self.cloud.lock:
+                    items = [item for item in store.values()
+                             if all(str(item.get(key)) in values for key, values in filters.items())]
+                reply = {}
+                if 'marker' in query:
+                    ids = [item['id'] for item in items]
+                    items = items[ids.index(query['marker'][0]) + 1:] if query['marker'][0] in ids else []
+                if 'limit' in query and len(items) > int(query['limit'][0]):
+                    # like neutron, a next link is only returned when a limit is asked for
+                    items = items[:int(query['limit'][0])]
+                    next_query = dict(query, marker=[items[-1]['id']])
+                    reply[plural + '_links'] = [{'rel': 'next', 'href': 'http://%s:%s/network/v2.0/%s?%s' % (
+                        self.server.server_address[:2] + (collection, urlencode(next_query, True)))}]
+                if fields:
+                    items = [dict((field, item.get(field)) for field in fields) for item in items]
+                reply[plural] = items
+                return self.reply(200, reply)
+            if method == 'POST':
+                requested = body[plural] if plural in body else [body[singular]]
+                created = []
+                with self.cloud.lock:
+                    for item in requested:
+                        item = dict(item, id=str(uuid.uuid4()), project_id=PROJECT_ID, tenant_id=PROJECT_ID,
+                                    status='ACTIVE')
+                        if singular == 'port':
+                            item.update({'device_id': '', 'fixed_ips': [{'ip_address': '10.0.0.%d' % (len(store) % 250 + 2)}]})
+                        store[item['id']] = item
+                        created.append(item)
+                if plural in body:
+                    return self.reply(201, {plural: created})
+                return self.reply(201, {singular: created[0]})
+            if method == 'DELETE':
+                with self.cloud.lock:
+                    found = store.pop(resource_id, None) is not None
+                return self.reply(204 if found else 404)
+        if re.match(r'^/quotas/([^/]+)$', path) and method == 'PUT':
+            return self.reply(200, body)
+        self.reply(404, {'NeutronError': {'type': 'HTTPNotFound', 'message': 'Not found'}})
+
+    def heat(self, method, path, query, body):
+        cloud = self.cloud
+        now = time.time()
+        if path == '/stacks' and method == 'GET':
+            with cloud.lock:
+                stacks = [cloud.stack_view(stack, now) for stack in cloud.stacks.values()]
+            stacks = [stack for stack in stacks if stack is not None]
+            if 'status' in query:
+                stacks = [stack for stack in stacks if stack['stack_status'].split('_', 1)[1] in query['status']]
+            if 'name' in query:
+                stacks = [stack for stack in stacks if stack['stack_name'] in query['name']]
+            if 'marker' in query:
+                ids = [stack['id'] for stack in stacks]
+                stacks = stacks[ids.index(query['marker'][0]) + 1:] if query['marker'][0] in ids else []
+            if 'limit' in query:
+                stacks = stacks[:int(query['limit'][0])]
+            return self.reply(200, {'stacks': stacks})
+        if path == '/stacks' and method == 'POST':
+            stack = {'id': str(uuid.uuid4()), 'stack_name': body['stack_name'], 'created': now, 'deleted': None,
+                     'creation_time': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}
+            with cloud.lock:
+                cloud.stacks[stack['id']] = stack
+            return self.reply(201, {'stack': {'id': stack['id'], 'links': []}})
+        match = re.match(r'^/stacks/(?:[^/]+/)?([^/]+)$', path)
+        if match:
+            with cloud.lock:
+                stack = cloud.stacks.get(match.group(1))
+                view = cloud.stack_view(stack, now) if stack is not None else None
+                if stack is not None and view is None:
+                    del cloud.stacks[stack['id']]
+            if view is None:
+                return self.reply(404, {'error': {'message': 'Stack not found'}})
+            if method == 'GET':
+                return self.reply(200, {'stack': view})
+            if method == 'DELETE':
+                if stack['deleted'] is None:
+                    stack['deleted'] = now
+                return self.reply(204)
+        self.reply(404, {'error': {'message': 'Not found'}})
+
+    def glance(self, method, path, query, body):
+        cloud = self.cloud
+        if path == '/schemas/image' and method == 'GET':
+            return self.reply(200, IMAGE_SCHEMA)
+        if path == '/images' and method == 'POST':
+            image = dict(body, id=str(uuid.uuid4()), status='queued', checksum=None, size=None)
+            cloud.images[image['id']] = image
+            return self.reply(201, image)
+        match = re.match(r'^/images/([^/]+)(/file)?$', path)
+        if match:
+            image = cloud.images.get(match.group(1))
+            if image is None:
+                return self.reply(404, {'error': {'message': 'Image not found'}})
+            if match.group(2) and method == 'PUT':
+                image.update({'status': 'active', 'size': len(body), 'checksum': hashlib.md5(body).hexdigest()})
+                return self.reply(204)
+            if method == 'GET':
+                return self.reply(200, image)
+            if method == 'DELETE':
+                del cloud.images[image['id']]
+                return self.reply(204)
+        self.reply(404, {'error': {'message': 'Not found'}})
+
+
+class FakeServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def serve(port=0, latency=0, **cloud_options):
+    handler = type('Handler', (FakeHandler,), {'cloud': FakeCloud(**cloud_options), 'latency': latency})
+    server = FakeServer(('127.0.0.1', port), handler)
+    sys.stdout.write('%s\n' % server.server_address[1])
+    sys.stdout.flush()
+    server.serve_forever()
+
+
+class FakeOpenStack(object):
+    """Robot Framework library starting the fake APIs in a child process."""
+
+    ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+    def __init__(self):
+        self._process = None
+        self.url = None
+
+    def start_fake_openstack(self, latency=0, build_time=2, boot_time=1, delete_time=1, stack_time=2,
+                             console_marker='login:', fail_pattern=None):
+        """ Start Fake OpenStack: start the fake APIs and return the keystone auth url
+        `latency` seconds added to every request
+        `build_time` seconds a server stays in BUILD, `boot_time` seconds after ACTIVE until `console_marker`
+        shows up in its console log, `delete_time` seconds servers and stacks take to disappear,
+        `stack_time` seconds a stack stays in CREATE_IN_PROGRESS
+        `fail_pattern` regular expression of the server and stack names that end up in error
+        """
+        args = [sys.executable, __file__, '--latency', str(latency), '--build-time', str(build_time),
+                '--boot-time', str(boot_time), '--delete-time', str(delete_time), '--stack-time', str(stack_time),
+                '--console-marker', console_marker]
+        if fail_pattern:
+            args += ['--fail-pattern', fail_pattern]
+        self._process = subprocess.Popen(args, stdout=subprocess.PIPE)
+        port = int(self._process.stdout.readline())
+        self.url = 'http://127.0.0.1:%d' % port
+        return self.url + '/identity/v3'
+
+    def stop_fake_openstack(self):
+        """ Stop Fake OpenStack: stop the fake APIs
+        """
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            self._process = None
+
+    def get_fake_request_count(self):
+        """ Get Fake Request Count: return the total number of requests served and the count per method and path
+        """
+        return json.loads(urlopen(self.url + '/_fake/stats').read().decode('utf-8'))
+
+    def reset_fake_request_count(self):
+        """ Reset Fake Request Count: reset the request counters
+        """
+        urlopen(Request(self.url + '/_fake/reset', data=b'')).read()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--build-time', type=float, default=2)
+    parser.add_argument('--boot-time', type=float, default=1)
+    parser.add_argument('--delete-time', type=float, default=1)
+    parser.add_argument('--stack-time', type=float, default=2)
+    parser.add_argument('--console-marker', default='login:')
+    parser.add_argument('--fail-pattern')
+    options = parser.parse_args()
+    serve(options.port, options.latency, build_time=options.build_time, boot_time=options.boot_time,
+          delete_time=options.delete_time, stack_time=options.stack_time, console_marker=options.console_marker,
+          fail_pattern=options.fail_pattern)
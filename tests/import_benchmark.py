@@ -0,0 +1,45 @@
+"""Import time benchmark of OpenStackKeywords.
+
+Measures, in fresh interpreters, the time to import the library, which is
+what Robot Framework, pabot workers and libdoc pay to discover keywords,
+against the time to import it together with every OpenStack client, which
+is what the library cost before the clients were loaded lazily.
+
+    python import_benchmark.py [runs]
+"""
+import os
+import subprocess
+import sys
+
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'OpenStackLibrary')
+CLIENTS = ('keystoneauth1.identity.v3', 'keystoneauth1.session', 'keystoneauth1.exceptions', 'keystoneclient.v3.client',
+           'novaclient.client', 'novaclient.exceptions', 'neutronclient.v2_0.client', 'neutronclient.common.exceptions',
+           'heatclient.client', 'heatclient.exc', 'glanceclient.client', 'glanceclient.exc')
+SCRIPT = """
+import sys, time, importlib
+sys.path.insert(0, %r)
+start = time.time()
+import OpenStackKeywords
+for name in %r:
+    importlib.import_module(name)
+sys.stdout.write('%%f' %% (time.time() - start))
+"""
+
+
+def measure(modules, runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', SCRIPT % (LIBRARY_PATH, modules)],
+                                         stderr=open(os.devnull, 'w'))
+        timings.append(float(output))
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    library = measure((), runs)
+    eager = measure(CLIENTS, runs)
+    print('library import:              %.3f s' % library)
+    print('library and all the clients: %.3f s' % eager)
+    print('saved per process:           %.3f s (%.0f%%)' % (eager - library, 100 * (eager - library) / eager))